@@ -1,18 +1,23 @@
-import json
 import time
-import random
 import os
 from get_player_info import get_player_info
+import http_client
+from jsonl_writer import JsonlWriter, compact
+from crawl_journal import CrawlJournal, STEP_WRITTEN, STEP_FAILED
 
 RETRY_DELAY = 60
-SLEEP_MIN = 1
-SLEEP_MAX = 3
 MAX_RETRIES = 5
 
+# 旧版本记录的未完成名单，存在时仍然优先读取
 unfinished_file = 'unfinished_ids.txt'
+# 进度日志：每处理完一个选手追加一行，全部处理完后删除
+journal_file = 'batch_journal.jsonl'
 output_file = 'all_players.json'
+# 处理过程中逐条追加，结束时整理为output_file
+stream_file = 'all_players.jsonl'
 
-# 读取未完成名单优先
+# 有进度日志或未完成名单时继续上次的处理，在上次的结果后追加
+resuming = os.path.exists(journal_file) or os.path.exists(unfinished_file)
 if os.path.exists(unfinished_file):
     with open(unfinished_file, 'r', encoding='utf-8') as f:
         player_lines = [line.strip() for line in f if line.strip()]
@@ -24,8 +29,14 @@ else:
             if line.count(':') >= 2:
                 player_lines.append(line.strip())
 
-all_players = []
+journal = CrawlJournal(journal_file)
+done_names = journal.players_with(STEP_WRITTEN, STEP_FAILED)
+if done_names:
+    print(f'进度日志中已处理{len(done_names)}人，跳过这些选手')
+
+writer = JsonlWriter(stream_file, append=resuming)
 failed_ids = []
+finished = False
 try:
     for idx, line in enumerate(player_lines):
         # 解析 name, href, count
@@ -34,6 +45,8 @@ try:
         except Exception:
             print(f'行格式错误: {line}')
             continue
+        if name in done_names:
+            continue
         url = f'https://liquipedia.net{href}'
         print(f'Processing: {name} ({idx+1}/{len(player_lines)})')
         for attempt in range(MAX_RETRIES):
@@ -48,9 +61,11 @@ try:
                         names.append(info['romanized_name'])
                     info['name'] = names
                     info.pop('romanized_name', None)
-                    all_players.append(info)
+                    writer.write(info)
+                    journal.mark(name, STEP_WRITTEN)
                 else:
                     failed_ids.append(name)
+                    journal.mark(name, STEP_FAILED)
                 break
             except Exception as e:
                 print(f'Error processing {name}: {e}')
@@ -59,24 +74,25 @@ try:
                     time.sleep(RETRY_DELAY)
                 else:
                     failed_ids.append(name)
-        time.sleep(random.uniform(SLEEP_MIN, SLEEP_MAX))
-        # 记录未完成名单
-        unfinished = player_lines[idx+1:]
-        with open(unfinished_file, 'w', encoding='utf-8') as f:
-            for u in unfinished:
-                f.write(u + '\n')
-        if not unfinished:
-            os.remove(unfinished_file)
+                    journal.mark(name, STEP_FAILED)
+    finished = True
 except KeyboardInterrupt:
     print('\n检测到中断，正在保存当前数据...')
 finally:
-    if all_players:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_players, f, ensure_ascii=False, indent=2)
-        print(f'已写入: {output_file}，共{len(all_players)}人')
+    writer.close()
+    journal.close()
+    # 全部处理完后删除进度记录，下次运行重新开始
+    if finished:
+        os.remove(journal_file)
+        if os.path.exists(unfinished_file):
+            os.remove(unfinished_file)
+    if os.path.getsize(stream_file):
+        count = compact(stream_file, output_file, indent=2)
+        print(f'已写入: {output_file}，共{count}人')
     # 记录失败名单
     if failed_ids:
         with open('failed_players.txt', 'w', encoding='utf-8') as f:
             for pid in failed_ids:
                 f.write(pid + '\n')
+    print(f'请求耗时: {http_client.describe_latency()}')
     print('批量处理完成！') 
\ No newline at end of file
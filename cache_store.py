@@ -0,0 +1,434 @@
+import os
+import sys
+import glob
+import pickle
+import sqlite3
+import zlib
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+UPSERT_SQL = (
+    'INSERT INTO cache (key, value, raw_size, compressed, expires_at, negative_reason) '
+    'VALUES (?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT(key) DO UPDATE SET value = excluded.value, raw_size = excluded.raw_size, '
+    'compressed = excluded.compressed, expires_at = excluded.expires_at, '
+    'negative_reason = excluded.negative_reason'
+)
+# zlib压缩级别，解析后的HTML重复度很高，默认级别已经足够
+COMPRESS_LEVEL = 6
+# 内存缓存默认上限（按序列化后的字节数计算）
+DEFAULT_MEMORY_LIMIT = 64 * 1024 * 1024
+DAY = 24 * 3600
+# set()中未指定ttl时使用缓存的默认有效期
+DEFAULT_TTL = object()
+
+def _encode(key, value, expires_at=None, negative_reason=None):
+    """序列化并压缩一条缓存，返回写入数据库的参数，压缩后更大的小条目直接存原文"""
+    raw = pickle.dumps(value)
+    data = zlib.compress(raw, COMPRESS_LEVEL)
+    if len(data) >= len(raw):
+        return key, raw, len(raw), 0, expires_at, negative_reason
+    return key, data, len(raw), 1, expires_at, negative_reason
+
+def _decode(data, compressed):
+    if compressed:
+        data = zlib.decompress(data)
+    return pickle.loads(data)
+
+class LRUCache:
+    """
+    按字节数限制大小的内存LRU缓存，作为磁盘缓存前面的一层
+    条目大小按序列化后的字节数估算
+    """
+    def __init__(self, max_bytes=DEFAULT_MEMORY_LIMIT):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: (value, expires_at)，不存在时返回None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            value, size, expires_at = entry
+            return value, expires_at
+
+    def put(self, key, value, size, expires_at=None):
+        with self.lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, size, expires_at)
+            self.total_bytes += size
+            self._evict()
+
+    def resize(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+# 所有磁盘缓存共用的内存层
+memory_cache = LRUCache()
+
+class CacheStore(MutableMapping):
+    """
+    基于SQLite的键值缓存，用法与dict相同
+    每次写入只更新对应的一条记录，并在单独的事务中提交，
+    写入中途崩溃不会损坏已有的缓存。每条记录单独压缩存储，读取时才解压。
+    最近读写的条目保存在共用的内存LRU中；设置了ttl的条目过期后视为不存在。
+    页面不存在、API返回错误等结果也可以作为负缓存写入，带上原因和较短的有效期。
+    可以在多个线程中同时使用，每个线程使用单独的数据库连接
+    """
+    def __init__(self, db_file, legacy_file=None, ttl=None, memory=memory_cache):
+        self.db_file = db_file
+        self.legacy_file = legacy_file
+        self.ttl = ttl
+        self.memory = memory
+        self._local = threading.local()
+        self._connections = []
+        self._connect_lock = threading.Lock()
+
+    @property
+    def conn(self):
+        """当前线程的数据库连接，第一次访问缓存时才打开"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._connect_lock:
+                conn = self._connect()
+                self._connections.append(conn)
+            self._local.conn = conn
+        return conn
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+        is_new = not os.path.exists(self.db_file)
+        # 多个线程同时写入时等待锁释放，而不是直接报错
+        conn = sqlite3.connect(self.db_file, timeout=60, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+            'raw_size INTEGER, compressed INTEGER NOT NULL DEFAULT 0, expires_at REAL, '
+            'negative_reason TEXT)'
+        )
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(cache)')}
+        if 'compressed' not in columns:
+            # 早期版本的数据库没有压缩，旧记录保持原样，重新写入时才压缩
+            conn.execute('ALTER TABLE cache ADD COLUMN raw_size INTEGER')
+            conn.execute('ALTER TABLE cache ADD COLUMN compressed INTEGER NOT NULL DEFAULT 0')
+            conn.execute('UPDATE cache SET raw_size = length(value)')
+        if 'expires_at' not in columns:
+            # 早期版本的记录没有有效期，从现在开始计算
+            conn.execute('ALTER TABLE cache ADD COLUMN expires_at REAL')
+            if self.ttl is not None:
+                conn.execute('UPDATE cache SET expires_at = ?', (time.time() + self.ttl,))
+        if 'negative_reason' not in columns:
+            conn.execute('ALTER TABLE cache ADD COLUMN negative_reason TEXT')
+        conn.commit()
+        if is_new and self.legacy_file and os.path.exists(self.legacy_file):
+            # 首次打开时从旧的pickle缓存导入数据
+            with open(self.legacy_file, 'rb') as f:
+                legacy_data = pickle.load(f)
+            expires_at = self._expires_at(DEFAULT_TTL)
+            with conn:
+                conn.executemany(
+                    UPSERT_SQL,
+                    [_encode(key, value, expires_at) for key, value in legacy_data.items()]
+                )
+            print(f"已从 {self.legacy_file} 导入 {len(legacy_data)} 条缓存")
+        return conn
+
+    def _expires_at(self, ttl):
+        if ttl is DEFAULT_TTL:
+            ttl = self.ttl
+        return None if ttl is None else time.time() + ttl
+
+    def _memory_key(self, key):
+        return (self.db_file, key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key):
+        now = time.time()
+        entry = self.memory.get(self._memory_key(key))
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > now:
+                return value
+            self.memory.remove(self._memory_key(key))
+        row = self.conn.execute(
+            'SELECT value, compressed, raw_size, expires_at FROM cache WHERE key = ? '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            (key, now)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        data, compressed, raw_size, expires_at = row
+        value = _decode(data, compressed)
+        self.memory.put(self._memory_key(key), value, raw_size or len(data), expires_at)
+        return value
+
+    def get(self, key, default=None, include_expired=False):
+        """
+        读取一条缓存
+        Args:
+            key: 键
+            default: 不存在时返回的值
+            include_expired: 为True时已过期的条目也返回（离线重新解析时使用旧数据）
+        Returns:
+            缓存的值，不存在时返回default
+        """
+        if not include_expired:
+            try:
+                return self[key]
+            except KeyError:
+                return default
+        entry = self.memory.get(self._memory_key(key))
+        if entry is not None:
+            return entry[0]
+        row = self.conn.execute(
+            'SELECT value, compressed, raw_size, expires_at FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        data, compressed, raw_size, expires_at = row
+        value = _decode(data, compressed)
+        self.memory.put(self._memory_key(key), value, raw_size or len(data), expires_at)
+        return value
+
+    def expires_at(self, key, include_expired=False):
+        """
+        读取一条缓存的过期时间
+        Args:
+            key: 键
+            include_expired: 为True时已过期的条目也返回
+        Returns:
+            float: 过期时间戳，永不过期时为None
+        Raises:
+            KeyError: 条目不存在（include_expired为False时包括已过期）
+        """
+        now = time.time()
+        entry = self.memory.get(self._memory_key(key))
+        if entry is not None and (include_expired or entry[1] is None or entry[1] > now):
+            return entry[1]
+        row = self.conn.execute('SELECT expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or not (include_expired or row[0] is None or row[0] > now):
+            raise KeyError(key)
+        return row[0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl=DEFAULT_TTL, negative_reason=None):
+        """
+        写入一条缓存
+        Args:
+            key: 键
+            value: 值
+            ttl: 有效期（秒），None表示永不过期，不指定时使用缓存的默认有效期
+            negative_reason: 负缓存的原因（页面不存在、API错误等），正常结果为None
+        """
+        params = _encode(key, value, self._expires_at(ttl), negative_reason)
+        with self.conn:
+            self.conn.execute(UPSERT_SQL, params)
+        self.memory.put(self._memory_key(key), value, params[2], params[4])
+
+    def __delitem__(self, key):
+        self.memory.remove(self._memory_key(key))
+        with self.conn:
+            cursor = self.conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self, include_expired=False):
+        """
+        全部键
+        Args:
+            include_expired: 为True时包括已过期的条目
+        Returns:
+            list: 键列表
+        """
+        if include_expired:
+            return [row[0] for row in self.conn.execute('SELECT key FROM cache')]
+        return [row[0] for row in self.conn.execute(
+            'SELECT key FROM cache WHERE expires_at IS NULL OR expires_at > ?', (time.time(),)
+        )]
+
+    def __len__(self):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM cache WHERE expires_at IS NULL OR expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+
+    def update_many(self, items):
+        """
+        在一个事务中批量写入
+        Args:
+            items: (key, value) 列表
+        """
+        expires_at = self._expires_at(DEFAULT_TTL)
+        with self.conn:
+            self.conn.executemany(
+                UPSERT_SQL,
+                [_encode(key, value, expires_at) for key, value in items]
+            )
+
+    def stats(self):
+        """
+        统计缓存大小
+        Returns:
+            dict: 条目数、已过期条目数、负缓存条目数、未压缩大小、实际存储大小（字节）
+        """
+        now = time.time()
+        entries, expired, negative, raw_size, stored_size = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(expires_at <= ?), 0), '
+            'COALESCE(SUM(negative_reason IS NOT NULL AND (expires_at IS NULL OR expires_at > ?)), 0), '
+            'COALESCE(SUM(raw_size), 0), COALESCE(SUM(length(value)), 0) FROM cache',
+            (now, now)
+        ).fetchone()
+        return {
+            'entries': entries,
+            'expired': expired,
+            'negative': negative,
+            'raw_size': raw_size,
+            'stored_size': stored_size
+        }
+
+    def negatives(self):
+        """
+        列出未过期的负缓存
+        Returns:
+            list: (key, 原因, 过期时间) 列表
+        """
+        return self.conn.execute(
+            'SELECT key, negative_reason, expires_at FROM cache WHERE negative_reason IS NOT NULL '
+            'AND (expires_at IS NULL OR expires_at > ?) ORDER BY key',
+            (time.time(),)
+        ).fetchall()
+
+    def purge_expired(self):
+        """
+        删除已过期的条目
+        Returns:
+            int: 删除的条目数
+        """
+        with self.conn:
+            cursor = self.conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def compress_all(self):
+        """
+        重新写入早期版本的未压缩记录，并回收数据库空间
+        Returns:
+            int: 重新写入的条目数
+        """
+        rows = self.conn.execute(
+            'SELECT key, value, expires_at, negative_reason FROM cache WHERE compressed = 0'
+        ).fetchall()
+        with self.conn:
+            self.conn.executemany(
+                UPSERT_SQL,
+                [_encode(key, pickle.loads(value), expires_at, reason) for key, value, expires_at, reason in rows]
+            )
+        self.conn.execute('VACUUM')
+        return len(rows)
+
+    def commit(self):
+        """提交当前线程未完成的事务（每次写入都会自动提交）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.commit()
+
+    def close(self):
+        """关闭所有线程的数据库连接"""
+        with self._connect_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._local = threading.local()
+
+def open_cache(db_file, legacy_file=None, ttl=None):
+    """
+    创建缓存对象，数据库在第一次访问时才会打开，条目按需读取
+    Args:
+        db_file: SQLite数据库文件
+        legacy_file: 旧的pickle缓存文件，数据库不存在时从中导入
+        ttl: 条目默认有效期（秒），None表示永不过期
+    Returns:
+        CacheStore: 缓存对象
+    """
+    return CacheStore(db_file, legacy_file, ttl)
+
+def set_memory_limit(max_bytes):
+    """设置内存缓存的上限（字节），超出时淘汰最久未使用的条目"""
+    memory_cache.resize(max_bytes)
+
+def print_stats(cache_dir='cache'):
+    """打印缓存目录下所有缓存的大小"""
+    print(f"{'缓存':<24}{'条目数':>8}{'已过期':>8}{'负缓存':>8}{'原始大小':>14}{'存储大小':>14}{'压缩率':>8}")
+    for db_file in sorted(glob.glob(os.path.join(cache_dir, '*.db'))):
+        store = CacheStore(db_file)
+        stats = store.stats()
+        store.close()
+        ratio = stats['stored_size'] / stats['raw_size'] if stats['raw_size'] else 0
+        print(f"{os.path.basename(db_file):<24}{stats['entries']:>8}{stats['expired']:>8}{stats['negative']:>8}"
+              f"{stats['raw_size'] / 1024:>12.1f}KB{stats['stored_size'] / 1024:>12.1f}KB{ratio:>8.1%}")
+
+def print_negatives(cache_dir='cache'):
+    """打印缓存目录下所有未过期的负缓存"""
+    for db_file in sorted(glob.glob(os.path.join(cache_dir, '*.db'))):
+        store = CacheStore(db_file)
+        negatives = store.negatives()
+        store.close()
+        if not negatives:
+            continue
+        print(f"\n{os.path.basename(db_file)}: {len(negatives)} 条负缓存")
+        for key, reason, expires_at in negatives:
+            expires = time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at)) if expires_at else '永不过期'
+            print(f"  {key}: {reason}（{expires} 过期）")
+
+if __name__ == "__main__":
+    # 用法: python cache_store.py stats|compress|negatives [缓存目录]
+    # compress会同时清理过期记录
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else 'cache'
+    if command == 'negatives':
+        print_negatives(cache_dir)
+        sys.exit(0)
+    if command == 'compress':
+        for db_file in sorted(glob.glob(os.path.join(cache_dir, '*.db'))):
+            store = CacheStore(db_file)
+            purged = store.purge_expired()
+            count = store.compress_all()
+            store.close()
+            print(f"{os.path.basename(db_file)}: 删除了 {purged} 条过期记录，重新写入了 {count} 条未压缩记录")
+    print_stats(cache_dir)
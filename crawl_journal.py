@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+from jsonl_writer import JsonlWriter, read_jsonl
+#抓取进度日志：逐条追加记录每个选手完成的步骤，程序中断后从日志恢复进度
+
+# 处理一个选手的步骤（按顺序）
+STEP_WIKITEXT = 'wikitext'
+STEP_HTML = 'html'
+STEP_RESULTS = 'results'
+STEP_EXTRACTED = 'extracted'
+STEP_WRITTEN = 'written'
+STEP_FAILED = 'failed'
+# 清除选手之前的所有步骤（页面有更新需要重新处理时记录）
+STEP_RESET = 'reset'
+STEPS = [STEP_WIKITEXT, STEP_HTML, STEP_RESULTS, STEP_EXTRACTED, STEP_WRITTEN]
+
+class CrawlJournal:
+    """
+    只追加的进度日志，每完成一个步骤写一行 {"player": 选手ID, "step": 步骤}
+    记录一个步骤的开销与剩余选手数量无关；打开时按顺序重放日志得到每个选手已完成的步骤，
+    遇到STEP_RESET时清除该选手之前的步骤
+    可以在多个线程中同时记录
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path: 日志文件
+        """
+        self.path = path
+        self.steps = {}
+        if os.path.exists(path):
+            for entry in read_jsonl(path):
+                if entry['step'] == STEP_RESET:
+                    self.steps.pop(entry['player'], None)
+                else:
+                    self.steps.setdefault(entry['player'], set()).add(entry['step'])
+        self._lock = threading.Lock()
+        self._writer = JsonlWriter(path)
+
+    def mark(self, player_name, step):
+        """记录选手完成了一个步骤，已记录过的步骤不重复写入"""
+        with self._lock:
+            done = self.steps.setdefault(player_name, set())
+            if step in done:
+                return
+            done.add(step)
+            self._writer.write({'player': player_name, 'step': step})
+
+    def reset(self, player_name):
+        """清除选手已完成的步骤，之后重新处理该选手"""
+        with self._lock:
+            if self.steps.pop(player_name, None) is not None:
+                self._writer.write({'player': player_name, 'step': STEP_RESET})
+
+    def has(self, player_name, step):
+        """选手是否已完成某个步骤"""
+        return step in self.steps.get(player_name, ())
+
+    def players_with(self, *steps):
+        """完成了任一给定步骤的选手"""
+        return {player_name for player_name, done in self.steps.items() if done.intersection(steps)}
+
+    def in_progress(self):
+        """
+        处理到一半的选手
+        Returns:
+            dict: 选手ID -> 已完成的步骤列表（按步骤顺序）
+        """
+        return {player_name: [step for step in STEPS if step in done]
+                for player_name, done in self.steps.items()
+                if STEP_WRITTEN not in done and STEP_FAILED not in done}
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def print_journal(path):
+    """打印日志中的进度统计"""
+    journal = CrawlJournal(path)
+    try:
+        print(f"{path}: 共 {len(journal.steps)} 个选手")
+        for step in STEPS + [STEP_FAILED]:
+            print(f"  {step:<10}{len(journal.players_with(step))}")
+        for player_name, done in journal.in_progress().items():
+            print(f"  处理中: {player_name}（已完成 {', '.join(done) or '无'}）")
+    finally:
+        journal.close()
+
+if __name__ == "__main__":
+    # 用法: python crawl_journal.py [日志文件]，查看抓取进度
+    print_journal(sys.argv[1] if len(sys.argv) > 1 else os.path.join('output', 'crawl_journal.jsonl'))
@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+from datetime import datetime
+from cache_store import open_cache
+#处理失败的选手放入死信队列，记录失败原因和下次重试时间，抓取结束后按退避时间重试，不中断整个抓取
+
+DEAD_LETTER_FILE = os.path.join("output", "dead_letter.db")
+# 第一次重试前等待的秒数，之后每次翻倍，不超过最大等待时间
+RETRY_BASE_DELAY = 60
+RETRY_MAX_DELAY = 3600
+# 失败达到这个次数后不再自动重试，留在队列中等待人工处理或下次运行
+MAX_ATTEMPTS = 5
+
+def retry_delay(attempts):
+    """第attempts次失败后到下次重试的等待秒数"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+class DeadLetterQueue:
+    """
+    持久化的死信队列：选手ID -> {'player', 'reason', 'permanent', 'attempts', 'first_failed', 'last_failed', 'next_retry'}
+    保存在SQLite中，程序重新运行后仍然存在；处理成功（包括下次运行时正常处理成功）后移出队列。
+    页面或数据不存在（permanent）的记录不自动重试，下次运行时重新处理
+    """
+    def __init__(self, db_file=DEAD_LETTER_FILE):
+        self.store = open_cache(db_file)
+
+    def add(self, player_name, reason, permanent=False, restart=False):
+        """
+        记录一次失败并安排下次重试
+        Args:
+            player_name: 选手ID
+            reason: 失败原因
+            permanent: 是否为页面或数据不存在等重试也不会成功的失败
+            restart: 是否重新开始计算失败次数和退避时间（新一次运行中第一次处理失败时为True）
+        Returns:
+            dict: 更新后的记录
+        """
+        now = time.time()
+        # 内存缓存中的对象是共用的，复制后再修改
+        entry = dict(self.store.get(player_name) or {'player': player_name, 'attempts': 0, 'first_failed': now})
+        if restart:
+            entry['attempts'] = 0
+        entry['attempts'] += 1
+        entry['reason'] = reason
+        entry['permanent'] = permanent
+        entry['last_failed'] = now
+        entry['next_retry'] = now + retry_delay(entry['attempts'])
+        self.store[player_name] = entry
+        return entry
+
+    def remove(self, player_name):
+        """重试成功后移出队列"""
+        self.store.pop(player_name, None)
+
+    def __contains__(self, player_name):
+        return player_name in self.store
+
+    def __len__(self):
+        return len(self.store)
+
+    def entries(self):
+        """全部记录，按下次重试时间排序"""
+        return sorted((self.store[key] for key in self.store), key=lambda entry: entry['next_retry'])
+
+    def retryable(self, player_names=None):
+        """
+        可以自动重试的记录：还没有达到最大失败次数，且不是重试也不会成功的失败
+        Args:
+            player_names: 只返回这些选手的记录，默认为全部
+        """
+        return [entry for entry in self.entries()
+                if entry['attempts'] < MAX_ATTEMPTS and not entry.get('permanent')
+                and (player_names is None or entry['player'] in player_names)]
+
+    def due(self, now=None, player_names=None):
+        """已经到了重试时间的记录"""
+        now = time.time() if now is None else now
+        return [entry for entry in self.retryable(player_names) if entry['next_retry'] <= now]
+
+    def close(self):
+        self.store.close()
+
+def retry_dead_letters(dead_letters, process, sleep=time.sleep, player_names=None):
+    """
+    按退避时间重试死信队列中的选手，直到全部成功或达到最大失败次数
+    Args:
+        dead_letters: DeadLetterQueue
+        process: 处理函数 process(选手ID)，返回 (是否成功, 失败原因, 是否为重试也不会成功的失败)
+        sleep: 等待函数
+        player_names: 只重试这些选手（本次运行处理的选手），默认为队列中的全部选手
+    Returns:
+        tuple: (重试成功的选手ID列表, 仍然失败的记录列表)
+    """
+    if player_names is not None:
+        player_names = set(player_names)
+    recovered = []
+    while True:
+        retryable = dead_letters.retryable(player_names)
+        if not retryable:
+            break
+        wait_time = retryable[0]['next_retry'] - time.time()
+        if wait_time > 0:
+            print(f"\n{len(retryable)} 个选手等待重试，{wait_time:.0f} 秒后重试 {retryable[0]['player']}")
+            sleep(wait_time)
+        for entry in dead_letters.due(player_names=player_names):
+            player_name = entry['player']
+            print(f"\n重试选手 {player_name}（第 {entry['attempts'] + 1} 次，上次失败原因: {entry['reason']}）")
+            success, reason, permanent = process(player_name)
+            if success:
+                dead_letters.remove(player_name)
+                recovered.append(player_name)
+            else:
+                entry = dead_letters.add(player_name, reason, permanent)
+                if permanent:
+                    print(f"选手 {player_name} 的页面或数据不存在，不再自动重试")
+                elif entry['attempts'] >= MAX_ATTEMPTS:
+                    print(f"选手 {player_name} 已失败 {entry['attempts']} 次，不再自动重试")
+    return recovered, [entry for entry in dead_letters.entries()
+                       if player_names is None or entry['player'] in player_names]
+
+def print_dead_letters(db_file=DEAD_LETTER_FILE):
+    """打印死信队列中的全部记录"""
+    dead_letters = DeadLetterQueue(db_file)
+    entries = dead_letters.entries()
+    print(f"{db_file}: {len(entries)} 个失败的选手")
+    for entry in entries:
+        next_retry = datetime.fromtimestamp(entry['next_retry']).strftime('%Y-%m-%d %H:%M:%S')
+        if entry.get('permanent'):
+            status = '页面或数据不存在，不自动重试'
+        elif entry['attempts'] >= MAX_ATTEMPTS:
+            status = '不再自动重试'
+        else:
+            status = f"下次重试 {next_retry}"
+        print(f"  {entry['player']}: 失败 {entry['attempts']} 次，{status}，原因: {entry['reason']}")
+    dead_letters.close()
+
+if __name__ == "__main__":
+    # 用法: python dead_letter.py [队列文件]，查看失败的选手
+    print_dead_letters(sys.argv[1] if len(sys.argv) > 1 else DEAD_LETTER_FILE)
@@ -1,15 +1,9 @@
-import requests
 import json
-import re
-from bs4 import BeautifulSoup
+import http_client
+import html_backend
+import results_table
 #ti详细数据
 class Dota2PlayerData:
-    def __init__(self):
-        self.api_url = 'https://liquipedia.net/dota2/api.php'
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-
     def get_player_results(self, player_name):
         """
         获取选手比赛结果数据
@@ -33,9 +27,7 @@ class Dota2PlayerData:
             f.write(json.dumps(content_params, indent=2))
             
             try:
-                response = requests.get(self.api_url, params=content_params, headers=self.headers)
-                response.raise_for_status()
-                content_data = response.json()
+                content_data = http_client.api_get(content_params)
                 
                 if 'error' in content_data:
                     f.write(f"\nAPI错误: {content_data['error']}\n")
@@ -53,19 +45,16 @@ class Dota2PlayerData:
                     content_file.write(page_content)
                 f.write(f"\n完整页面内容已保存到 {raw_content_file}\n")
                 
-                # 使用BeautifulSoup解析HTML内容
-                soup = BeautifulSoup(page_content, 'html.parser')
-                
-                # 找到比赛结果表格
-                table = soup.find('table', {'class': 'wikitable'})
-                if not table:
+                # 解析比赛结果表格
+                rows = results_table.parse_results_table(page_content)
+                if rows is None:
                     f.write("\n未找到比赛结果表格\n")
                     return None
                     
                 f.write("\n找到比赛结果表格\n")
                 
                 # 解析TI参赛情况
-                ti_participation = self._parse_ti_participation(table)
+                ti_participation = self._parse_ti_participation(rows)
                 
                 # 打印解析后的数据
                 f.write("\nTI参赛情况:\n")
@@ -95,9 +84,7 @@ class Dota2PlayerData:
         print(json.dumps(content_params, indent=2))
         
         try:
-            response = requests.get(self.api_url, params=content_params, headers=self.headers)
-            response.raise_for_status()
-            content_data = response.json()
+            content_data = http_client.api_get(content_params)
             
             if 'error' in content_data:
                 print(f"API错误: {content_data['error']}")
@@ -106,8 +93,8 @@ class Dota2PlayerData:
             # 获取页面内容
             page_content = content_data['parse']['text']['*']
             
-            # 使用BeautifulSoup解析HTML内容
-            soup = BeautifulSoup(page_content, 'html.parser')
+            # 只解析到选手信息表格结束
+            soup = html_backend.region_soup(page_content, 'table', 'infobox')
             
             # 找到选手信息表格
             info_table = soup.find('table', {'class': 'infobox'})
@@ -187,104 +174,11 @@ class Dota2PlayerData:
         
         return player_info
 
-    def _parse_ti_participation(self, table):
+    def _parse_ti_participation(self, rows):
         """
         解析TI参赛情况
         """
-        ti_participation = {
-            'total_participations': 0,
-            'years': [],
-            'details': [],
-            'best_placement': {
-                'year': '',
-                'place': '',
-                'prize': ''
-            }
-        }
-        
-        # 遍历表格行
-        for row in table.find_all('tr')[1:]:  # 跳过表头
-            # 检查是否是高亮行（TI比赛通常会有特殊背景）
-            is_highlighted = 'tournament-highlighted-bg' in row.get('class', [])
-            
-            cols = row.find_all('td')
-            if len(cols) < 8:  # 确保有足够的列
-                continue
-            
-            # 获取比赛名称
-            tournament_cell = cols[4]  # 第5列包含比赛名称
-            tournament_link = tournament_cell.find('a')
-            if not tournament_link:
-                continue
-                
-            tournament_text = tournament_link.text.strip()
-            
-            # 使用正则表达式匹配TI正赛
-            ti_match = re.search(r'The International (\d{4})(?!.*Qualifier)', tournament_text)
-            if not ti_match:
-                continue
-                
-            year = ti_match.group(1)
-            
-            # 获取日期（第1列）
-            date = cols[0].text.strip()
-            
-            # 获取名次（第2列）
-            placement_cell = cols[1]
-            placement = placement_cell.find('b', class_='placement-text')
-            if placement:
-                place = placement.text.strip()
-            else:
-                place = placement_cell.text.strip()
-            
-            # 获取队伍名称（第6列）
-            team_cell = cols[5]
-            team = team_cell.text.strip()
-            
-            # 获取奖金（第8列）
-            prize = cols[7].text.strip() if len(cols) > 7 else ''
-            
-            if year not in ti_participation['years']:
-                ti_participation['years'].append(year)
-                ti_participation['total_participations'] += 1
-                
-                # 记录详细信息
-                detail = {
-                    'year': year,
-                    'date': date,
-                    'place': place,
-                    'team': team,
-                    'prize': prize,
-                    'is_highlighted': is_highlighted
-                }
-                ti_participation['details'].append(detail)
-                
-                # 更新最好名次
-                if not ti_participation['best_placement']['year'] or self._is_better_placement(place, ti_participation['best_placement']['place']):
-                    ti_participation['best_placement'] = {
-                        'year': year,
-                        'place': place,
-                        'prize': prize
-                    }
-        
-        # 按年份排序
-        ti_participation['years'].sort()
-        ti_participation['details'].sort(key=lambda x: x['year'])
-        
-        return ti_participation
-
-    def _is_better_placement(self, place1, place2):
-        """
-        比较两个名次，判断place1是否比place2更好
-        """
-        def get_numeric_placement(place):
-            # 提取数字部分
-            match = re.search(r'(\d+)(?:st|nd|rd|th)?', place)
-            if match:
-                return int(match.group(1))
-            return float('inf')
-        
-        return get_numeric_placement(place1) < get_numeric_placement(place2)
+        return results_table.ti_details(rows)
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,15 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
 from collections import Counter
-import time
+import http_client
 
 def fetch_player_names(year):
-    url = f"https://liquipedia.net/dota2/Portal:Statistics/{year}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; scraping for research purpose)"
-    }
-
-    response = requests.get(url, headers=headers)
+    response = http_client.get_page(f"Portal:Statistics/{year}")
     if response.status_code != 200:
         print(f"Failed to fetch {year}: {response.status_code}")
         return []
@@ -48,7 +42,6 @@ def main():
             key = f"{name}:{href}"
             player_counter[key] += 1
             href_map[key] = (name, href)
-        time.sleep(1)  # 防止请求过快被ban
 
     print("\n--- Player Appearance Count (2011-2025) ---")
     for key, count in player_counter.most_common():
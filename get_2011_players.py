@@ -1,24 +1,6 @@
-import requests
 import json
 from bs4 import BeautifulSoup
-import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-
-def create_session():
-    """
-    创建一个带有重试机制的session
-    """
-    session = requests.Session()
-    retry = Retry(
-        total=3,
-        backoff_factor=2,
-        status_forcelist=[429, 500, 502, 503, 504]
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
+import http_client
 
 def get_players_by_year(year):
     """
@@ -28,25 +10,6 @@ def get_players_by_year(year):
     Returns:
         list: 包含选手ID的列表
     """
-    # API配置
-    api_url = 'https://liquipedia.net/dota2/api.php'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Referer': 'https://liquipedia.net/dota2/',
-        'Origin': 'https://liquipedia.net',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'DNT': '1'
-    }
-    
-    # 创建session
-    session = create_session()
-    
     try:
         # 获取统计页面内容
         params = {
@@ -57,9 +20,7 @@ def get_players_by_year(year):
         }
         
         print(f"正在获取{year}年选手信息...")
-        response = session.get(api_url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = http_client.api_get(params)
         
         if 'error' in data:
             print(f"获取{year}年页面内容失败: {data['error']}")
@@ -94,8 +55,6 @@ def get_players_by_year(year):
     except Exception as e:
         print(f"Error: {str(e)}")
         return []
-    finally:
-        session.close()
 
 def get_all_players():
     """
@@ -107,8 +66,6 @@ def get_all_players():
     for year in range(2011, 2026):
         players = get_players_by_year(year)
         all_players.update(players)
-        # 添加延迟避免请求过快
-        time.sleep(3)
     
     return sorted(list(all_players))  # 转换为排序后的列表
 
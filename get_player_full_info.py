@@ -1,437 +1,811 @@
-import requests
 import json
-from bs4 import BeautifulSoup
+import asyncio
+import queue
+import threading
+import multiprocessing
+import copy
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import time
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 import re
 import os
 from urllib.parse import unquote
-import random
 import sys
-import pickle
 from pathlib import Path
+from rate_limiter import rate_limiter
+import http_client
+from cache_store import open_cache, DAY
+from infobox_parser import parse_infobox
+import html_backend
+import results_table
+from jsonl_writer import JsonlWriter, read_jsonl, compact
+from crawl_journal import CrawlJournal, STEP_WIKITEXT, STEP_HTML, STEP_RESULTS, STEP_EXTRACTED, STEP_WRITTEN, STEP_FAILED
+from dead_letter import DeadLetterQueue, retry_dead_letters, retry_delay
+import ti_index
 
 # 缓存相关配置
 CACHE_DIR = "cache"
-WIKITEXT_CACHE_FILE = os.path.join(CACHE_DIR, "wikitext_cache.pkl")
-HTML_CACHE_FILE = os.path.join(CACHE_DIR, "html_cache.pkl")
-TI_CACHE_FILE = os.path.join(CACHE_DIR, "ti_cache.pkl")
+WIKITEXT_CACHE_FILE = os.path.join(CACHE_DIR, "wikitext_cache.db")
+HTML_CACHE_FILE = os.path.join(CACHE_DIR, "html_cache.db")
+TI_CACHE_FILE = os.path.join(CACHE_DIR, "ti_cache.db")
+REVISION_CACHE_FILE = os.path.join(CACHE_DIR, "revision_cache.db")
+RESULTS_CACHE_FILE = os.path.join(CACHE_DIR, "results_cache.db")
+TEMPLATE_CACHE_FILE = os.path.join(CACHE_DIR, "template_cache.db")
+RECORD_CACHE_FILE = os.path.join(CACHE_DIR, "record_cache.db")
+# 各缓存的有效期，现役选手的Results变化频繁，单独设置较短的有效期
+WIKITEXT_CACHE_TTL = 7 * DAY
+HTML_CACHE_TTL = 7 * DAY
+TI_CACHE_TTL = 30 * DAY
+ACTIVE_TI_CACHE_TTL = 1 * DAY
+# 页面不存在、API返回错误等负缓存的有效期
+NEGATIVE_CACHE_TTL = 1 * DAY
 
-def load_cache(cache_file):
-    """加载缓存"""
-    if os.path.exists(cache_file):
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
-    return {}
+# 单次query请求最多合并的标题数
+QUERY_BATCH_SIZE = 50
+# TI数据来源：'results' 逐个解析选手的Results页面；
+# 'tournament' 解析每届TI页面建立索引，parse请求数与选手数量无关
+TI_SOURCE = 'results'
+# 选手信息只用到信息框，默认只获取页面的第0段（第一个标题之前的部分）
+INFOBOX_SECTION = 0
+# 解析流水线中已获取、等待解析的选手数量上限，解析跟不上时暂停网络请求
+PARSE_QUEUE_SIZE = 16
+
+def load_cache(cache_file, ttl=None):
+    """加载缓存（延迟到第一次访问时才打开），首次打开时导入同名的旧pickle缓存"""
+    legacy_file = os.path.splitext(cache_file)[0] + ".pkl"
+    return open_cache(cache_file, legacy_file, ttl)
 
 def save_cache(cache_file, cache_data):
-    """保存缓存"""
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    with open(cache_file, 'wb') as f:
-        pickle.dump(cache_data, f)
+    """保存缓存（每条记录写入时已单独提交，这里只确保事务已提交）"""
+    cache_data.commit()
+
+def save_negative_cache(cache_file, cache_data, key, value, reason):
+    """
+    缓存页面不存在、API错误等结果，重新运行时不再请求，有效期较短
+    Args:
+        cache_file: 缓存文件
+        cache_data: 缓存对象
+        key: 选手ID
+        value: 要缓存的API返回结果
+        reason: 原因
+    """
+    cache_data.set(key, value, ttl=NEGATIVE_CACHE_TTL, negative_reason=reason)
+    save_cache(cache_file, cache_data)
+
+def _api_error_reason(data):
+    """API返回的error字段转为原因描述"""
+    error = data.get('error', {})
+    return f"{error.get('code', 'error')}: {error.get('info', '')}"
 
 # 加载缓存
-wikitext_cache = load_cache(WIKITEXT_CACHE_FILE)
-html_cache = load_cache(HTML_CACHE_FILE)
-ti_cache = load_cache(TI_CACHE_FILE)
+wikitext_cache = load_cache(WIKITEXT_CACHE_FILE, WIKITEXT_CACHE_TTL)
+html_cache = load_cache(HTML_CACHE_FILE, HTML_CACHE_TTL)
+ti_cache = load_cache(TI_CACHE_FILE, TI_CACHE_TTL)
+# 页面标题 -> {revid, touched}，用于增量更新
+revision_cache = load_cache(REVISION_CACHE_FILE)
+# Results页面原始HTML和模板展开结果，修改解析代码后可以离线重新解析
+results_cache = load_cache(RESULTS_CACHE_FILE, TI_CACHE_TTL)
+template_cache = load_cache(TEMPLATE_CACHE_FILE, WIKITEXT_CACHE_TTL)
+# 选手ID -> 解析结果及其版本键，页面和解析代码都没有变化时跳过解析
+record_cache = load_cache(RECORD_CACHE_FILE, WIKITEXT_CACHE_TTL)
+# 解析代码版本，第一次使用时计算
+_extractor_version = None
+# 抓取进度日志，由主程序打开，没有打开时不记录
+JOURNAL_FILE = os.path.join("output", "crawl_journal.jsonl")
+crawl_journal = None
 
-def create_session():
+# 选手ID -> 最近一次处理失败的原因，主程序放入死信队列时读取
+failure_reasons = {}
+# 失败原因是页面或数据不存在（包括命中负缓存）的选手，重试也不会成功
+permanent_failures = set()
+
+def _record_failure(player_name, reason, permanent=False):
     """
-    创建一个带有重试机制的session
+    打印并记录选手处理失败的原因
+    Args:
+        player_name: 选手ID
+        reason: 失败原因
+        permanent: 是否为页面不存在、没有比赛结果表格等重试也不会成功的失败，网络错误等异常为False
     """
-    session = requests.Session()
-    retry = Retry(
-        total=5,
-        backoff_factor=5,
-        status_forcelist=[429, 500, 502, 503, 504]
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
+    print(reason)
+    failure_reasons[player_name] = reason
+    if permanent:
+        permanent_failures.add(player_name)
+    else:
+        permanent_failures.discard(player_name)
 
-def get_player_full_info(player_name):
+def _clear_failure(player_name):
+    """开始处理选手前清除上一次的失败记录"""
+    failure_reasons.pop(player_name, None)
+    permanent_failures.discard(player_name)
+
+def _journal_step(player_name, step):
+    """记录选手完成了一个处理步骤（没有打开进度日志时不记录）"""
+    if crawl_journal is not None:
+        crawl_journal.mark(player_name, step)
+
+def _api_get(session, params):
     """
-    获取选手的完整信息
+    发送API请求，遇到429时由限速器按Retry-After暂停并放慢该action后重试
     Args:
-        player_name: 选手ID
+        session: requests session
+        params: API请求参数
     Returns:
-        dict: 包含选手完整信息的字典
+        dict: API返回的JSON数据
     """
-    # API配置
-    api_url = 'https://liquipedia.net/dota2/api.php'
-    headers = {
-        'User-Agent': 'Dota2PlayerInfoBot/1.0 (https://github.com/844192221/Dota2Parse; starzhangxing@live.com)',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Referer': 'https://liquipedia.net/dota2/',
-        'Origin': 'https://liquipedia.net',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'DNT': '1'
-    }
+    return http_client.api_get(params, session=session)
+
+def _query_pages(session, titles, params):
+    """
+    按块批量发送query请求，每次最多合并50个标题
+    Args:
+        session: requests session
+        titles: 页面标题列表
+        params: query请求参数（不含titles）
+    Returns:
+        dict: 请求的标题 -> 页面数据，请求失败的标题不在结果中
+    """
+    result = {}
+    for start in range(0, len(titles), QUERY_BATCH_SIZE):
+        chunk = titles[start:start + QUERY_BATCH_SIZE]
+        chunk_params = {**params, 'titles': '|'.join(chunk)}
+        
+        pages = {}
+        title_map = {}
+        try:
+            while True:
+                data = _api_get(session, chunk_params)
+                
+                query = data.get('query', {})
+                for item in query.get('normalized', []):
+                    title_map[item['from']] = item['to']
+                for page_id, page in query.get('pages', {}).items():
+                    merged = pages.setdefault(page_id, page)
+                    if 'revisions' in page:
+                        merged['revisions'] = page['revisions']
+                
+                # 内容过大时API会分多次返回
+                if 'continue' not in data:
+                    break
+                chunk_params = {**chunk_params, **data['continue']}
+        except Exception as e:
+            print(f"批量请求失败: {str(e)}")
+            continue
+        
+        pages_by_title = {page['title']: page for page in pages.values()}
+        for title in chunk:
+            page = pages_by_title.get(title_map.get(title, title))
+            if page is not None:
+                result[title] = page
+    return result
+
+def prefetch_wikitext(player_names):
+    """
+    批量获取选手页面的wikitext并写入缓存
+    返回结果按选手拆分后存入wikitext_cache，格式与单个选手请求的返回一致，
+    get_player_full_info可直接使用
+    Args:
+        player_names: 选手ID列表
+    Returns:
+        int: 新写入缓存的选手数量
+    """
+    pending = [name for name in dict.fromkeys(player_names) if name not in wikitext_cache]
+    if not pending:
+        return 0
+    print(f"批量获取 {len(pending)} 个选手的wikitext...")
     
-    # 创建session
-    session = create_session()
+    params = {
+        'action': 'query',
+        'format': 'json',
+        'prop': 'revisions',
+        'rvprop': 'content',
+        'rvsection': INFOBOX_SECTION
+    }
+    pages = _query_pages(http_client.get_session(), pending, params)
     
-    try:
-        # 1. 获取wikitext内容（使用缓存）
-        if player_name in wikitext_cache:
-            print("使用缓存的wikitext内容")
-            wikitext_data = wikitext_cache[player_name]
+    fetched = 0
+    for name, page in pages.items():
+        if 'missing' in page or 'invalid' in page:
+            page_id = '-1'
+        elif 'revisions' in page:
+            page_id = str(page['pageid'])
         else:
-            print("从API获取wikitext内容")
-            wikitext_params = {
-                'action': 'query',
-                'format': 'json',
-                'titles': player_name,
-                'prop': 'revisions',
-                'rvprop': 'content'
-            }
-            
-            start_time = time.time()
-            retry_count = 0
-            while True:
-                try:
-                    response = session.get(api_url, params=wikitext_params, headers=headers)
-                    response.raise_for_status()
-                    wikitext_data = response.json()
-                    # 保存到缓存
-                    wikitext_cache[player_name] = wikitext_data
-                    save_cache(WIKITEXT_CACHE_FILE, wikitext_cache)
-                    break
-                except requests.exceptions.HTTPError as e:
-                    if e.response.status_code == 429:  # Too Many Requests
-                        retry_count += 1
-                        wait_time = 3600  # 1小时
-                        print(f"\n遇到请求限制，第{retry_count}次自动重试...")
-                        print(f"将在{wait_time/60:.0f}分钟后自动重试")
-                        time.sleep(wait_time)
-                        continue
-                    raise
-                except Exception as e:
-                    print(f"Error: {str(e)}")
-                    return None
-            
-            # 严格遵守API限制：每2秒最多1个请求
-            time.sleep(2)
+            # 没有拿到内容的页面留给单独请求处理
+            continue
+        wikitext_data = {'query': {'pages': {page_id: page}}}
+        if page_id == '-1':
+            save_negative_cache(WIKITEXT_CACHE_FILE, wikitext_cache, name, wikitext_data, '页面不存在')
+        else:
+            wikitext_data['section'] = INFOBOX_SECTION
+            wikitext_cache[name] = wikitext_data
+        fetched += 1
+    save_cache(WIKITEXT_CACHE_FILE, wikitext_cache)
+    
+    print(f"批量获取完成，新缓存 {fetched} 个选手的wikitext")
+    return fetched
+
+def _cached_revid(player_name):
+    """
+    缓存的选手页面数据中记录的revid（parse请求获取的数据才有），没有时返回None
+    """
+    html_data = html_cache.get(player_name)
+    if html_data and 'parse' in html_data and html_data['parse'].get('revid'):
+        return html_data['parse']['revid']
+    wikitext_data = wikitext_cache.get(player_name)
+    if wikitext_data:
+        for page in wikitext_data['query']['pages'].values():
+            for revision in page.get('revisions', []):
+                if revision.get('revid'):
+                    return revision['revid']
+    return None
+
+def refresh_changed_pages(player_names):
+    """
+    批量检查选手页面和Results页面的修订版本，清除已变化页面的缓存
+    wikitext只在revid变化时重新获取；解析后的HTML和Results还依赖模板和比赛数据，
+    revid或touched任一变化都会重新获取。
+    还没有记录过版本的页面只记录当前版本，不清除缓存（缓存的数据中有revid且不一致时除外），
+    避免第一次检查时重新获取所有已缓存的选手
+    Args:
+        player_names: 选手ID列表
+    Returns:
+        list: 页面或Results页面版本有变化、需要重新获取数据的选手ID
+    """
+    player_names = list(dict.fromkeys(player_names))
+    titles = []
+    for name in player_names:
+        titles.extend([name, f"{name}/Results"])
+    print(f"检查 {len(player_names)} 个选手的页面版本...")
+    
+    params = {
+        'action': 'query',
+        'format': 'json',
+        'prop': 'info|revisions',
+        'rvprop': 'ids|timestamp'
+    }
+    pages = _query_pages(http_client.get_session(), titles, params)
+    
+    def current_revision(title):
+        page = pages[title]
+        if 'missing' in page or 'invalid' in page:
+            return {'revid': None, 'touched': None}
+        return {'revid': page.get('lastrevid'), 'touched': page.get('touched')}
+    
+    changed = []
+    for name in player_names:
+        results_title = f"{name}/Results"
+        if name not in pages or results_title not in pages:
+            # 版本检查失败，保留现有缓存
+            continue
         
-        # 获取wikitext内容
-        pages = wikitext_data['query']['pages']
-        page_id = list(pages.keys())[0]
+        is_changed = False
+        page_rev = current_revision(name)
+        old_page_rev = revision_cache.get(name)
+        if old_page_rev is None:
+            # 第一次检查：只有缓存的数据来自其它修订版本时才清除
+            cached_revid = _cached_revid(name)
+            if cached_revid is not None and cached_revid != page_rev['revid']:
+                old_page_rev = {'revid': cached_revid, 'touched': None}
+        if old_page_rev is not None and old_page_rev != page_rev:
+            if old_page_rev.get('revid') != page_rev['revid']:
+                wikitext_cache.pop(name, None)
+            html_cache.pop(name, None)
+            for template in _player_templates(name):
+                template_cache.pop(template, None)
+            is_changed = True
+        revision_cache[name] = page_rev
         
-        if page_id == '-1':
-            print(f"未找到选手 {player_name} 的页面")
+        results_rev = current_revision(results_title)
+        old_results_rev = revision_cache.get(results_title)
+        if old_results_rev is not None and old_results_rev != results_rev:
+            ti_cache.pop(name, None)
+            results_cache.pop(name, None)
+            is_changed = True
+        revision_cache[results_title] = results_rev
+        
+        if is_changed:
+            changed.append(name)
+    
+    save_cache(WIKITEXT_CACHE_FILE, wikitext_cache)
+    save_cache(HTML_CACHE_FILE, html_cache)
+    save_cache(TI_CACHE_FILE, ti_cache)
+    save_cache(RESULTS_CACHE_FILE, results_cache)
+    save_cache(TEMPLATE_CACHE_FILE, template_cache)
+    save_cache(REVISION_CACHE_FILE, revision_cache)
+    
+    print(f"版本检查完成，{len(changed)} 个选手的页面有更新")
+    return changed
+
+def _fetch_player_page(session, player_name, section=INFOBOX_SECTION):
+    """
+    用一次parse请求同时获取选手页面的HTML和wikitext，分别写入两个缓存
+    wikitext按query请求的返回格式保存，已有缓存时不请求也不覆盖；获取完整页面时总是请求并覆盖
+    只获取一段时，两个缓存中都记录段落编号
+    Args:
+        session: requests session
+        player_name: 选手ID
+        section: 只获取的段落编号，None表示完整页面
+    Returns:
+        dict: 与单独请求HTML时格式一致的parse结果，出错时为API返回的错误
+    """
+    need_wikitext = player_name not in wikitext_cache or section is None
+    params = {
+        'action': 'parse',
+        'format': 'json',
+        'page': player_name,
+        'prop': 'text|wikitext|revid' if need_wikitext else 'text|revid'
+    }
+    if section is not None:
+        params['section'] = section
+    data = _api_get(session, params)
+    
+    # API返回错误时也缓存，避免重复请求
+    if 'error' in data:
+        save_negative_cache(HTML_CACHE_FILE, html_cache, player_name, data, _api_error_reason(data))
+        if data['error'].get('code') == 'missingtitle' and player_name not in wikitext_cache:
+            missing_data = {'query': {'pages': {'-1': {'title': player_name, 'missing': ''}}}}
+            save_negative_cache(WIKITEXT_CACHE_FILE, wikitext_cache, player_name, missing_data, '页面不存在')
+        return data
+    
+    parse = data['parse']
+    if need_wikitext:
+        page = {
+            'pageid': parse['pageid'],
+            'ns': 0,
+            'title': parse['title'],
+            'revisions': [{'revid': parse.get('revid'), '*': parse['wikitext']['*']}]
+        }
+        wikitext_data = {'query': {'pages': {str(parse['pageid']): page}}}
+        if section is not None:
+            wikitext_data['section'] = section
+        wikitext_cache[player_name] = wikitext_data
+        save_cache(WIKITEXT_CACHE_FILE, wikitext_cache)
+    
+    # HTML缓存不重复保存wikitext
+    html_data = {'parse': {key: value for key, value in parse.items() if key != 'wikitext'}}
+    if section is not None:
+        html_data['section'] = section
+    html_cache[player_name] = html_data
+    save_cache(HTML_CACHE_FILE, html_cache)
+    return html_data
+
+def _page_wikitext(wikitext_data):
+    """从query请求的返回中取出wikitext，页面不存在时返回None"""
+    pages = wikitext_data['query']['pages']
+    page_id = list(pages.keys())[0]
+    if page_id == '-1':
+        return None
+    return pages[page_id]['revisions'][0]['*']
+
+def _needs_full_page(wikitext_data):
+    """
+    只获取了第0段时，判断是否还需要完整页面：
+    第0段中没有信息框，或信息框没有history字段（历史战队写在正文的Dota 2部分）
+    Args:
+        wikitext_data: wikitext缓存中的数据
+    Returns:
+        bool: 是否需要重新获取完整页面
+    """
+    if wikitext_data.get('section') is None:
+        return False
+    infobox = parse_infobox(_page_wikitext(wikitext_data))
+    return not infobox or 'history' not in infobox
+
+def _build_payload(player_name, wikitext, html_data):
+    """组装解析阶段使用的原始数据，TI数据由调用方补充"""
+    infobox = parse_infobox(wikitext)
+    return {
+        'id': player_name,
+        'status': infobox.get('status', ''),
+        'wikitext': wikitext,
+        'infobox': infobox,
+        'html': html_data['parse']['text']['*'],
+        'ti_data': None,
+        'results_html': None
+    }
+
+def fetch_player_payload(session, player_name):
+    """
+    网络请求阶段：获取解析选手信息所需的原始数据（使用缓存）
+    Args:
+        session: requests session
+        player_name: 选手ID
+    Returns:
+        dict: {'id', 'status', 'wikitext', 'html', 'ti_data', 'results_html'}，
+              TI数据没有缓存时ti_data为None，results_html为待解析的Results页面；获取失败时返回None
+    """
+    # 1. 获取wikitext内容（使用缓存）
+    if player_name in wikitext_cache:
+        print("使用缓存的wikitext内容")
+        wikitext_data = wikitext_cache[player_name]
+    elif player_name not in html_cache:
+        # wikitext和HTML都没有缓存时，用一次parse请求同时获取
+        print("从API获取wikitext和HTML内容")
+        html_data = _fetch_player_page(session, player_name)
+        if player_name not in wikitext_cache:
+            _record_failure(player_name, f"获取HTML内容失败: {_api_error_reason(html_data)}", permanent=True)
             return None
-            
-        wikitext = pages[page_id]['revisions'][0]['*']
+        wikitext_data = wikitext_cache[player_name]
+    else:
+        print("从API获取wikitext内容")
+        wikitext_params = {
+            'action': 'query',
+            'format': 'json',
+            'titles': player_name,
+            'prop': 'revisions',
+            'rvprop': 'content',
+            'rvsection': INFOBOX_SECTION
+        }
         
-        # 2. 获取HTML内容（使用缓存）
-        if player_name in html_cache:
-            print("使用缓存的HTML内容")
-            html_data = html_cache[player_name]
+        wikitext_data = _api_get(session, wikitext_params)
+        # 保存到缓存，页面不存在时也缓存，避免重复请求
+        if '-1' in wikitext_data['query']['pages']:
+            save_negative_cache(WIKITEXT_CACHE_FILE, wikitext_cache, player_name, wikitext_data, '页面不存在')
         else:
-            print("从API获取HTML内容")
-            html_params = {
-                'action': 'parse',
-                'format': 'json',
-                'page': player_name,
-                'prop': 'text'
-            }
-            
-            start_time = time.time()
-            retry_count = 0
-            while True:
-                try:
-                    response = session.get(api_url, params=html_params, headers=headers)
-                    response.raise_for_status()
-                    html_data = response.json()
-                    # 保存到缓存
-                    html_cache[player_name] = html_data
-                    save_cache(HTML_CACHE_FILE, html_cache)
-                    break
-                except requests.exceptions.HTTPError as e:
-                    if e.response.status_code == 429:  # Too Many Requests
-                        retry_count += 1
-                        wait_time = 3600  # 1小时
-                        print(f"\n遇到请求限制，第{retry_count}次自动重试...")
-                        print(f"将在{wait_time/60:.0f}分钟后自动重试")
-                        time.sleep(wait_time)
-                        continue
-                    raise
-                except Exception as e:
-                    print(f"Error: {str(e)}")
-                    return None
-            
-            # 严格遵守API限制：parse请求每30秒最多1个
-            time.sleep(30)
-        
+            wikitext_data['section'] = INFOBOX_SECTION
+            wikitext_cache[player_name] = wikitext_data
+            save_cache(WIKITEXT_CACHE_FILE, wikitext_cache)
+    
+    # 获取wikitext内容
+    wikitext = _page_wikitext(wikitext_data)
+    if wikitext is None:
+        _record_failure(player_name, f"未找到选手 {player_name} 的页面", permanent=True)
+        return None
+    
+    # 第0段中的信息框不够用时，重新获取完整页面的wikitext和HTML
+    if _needs_full_page(wikitext_data):
+        print("第0段中没有完整的信息框，从API获取完整页面")
+        html_data = _fetch_player_page(session, player_name, section=None)
         if 'error' in html_data:
-            print(f"获取HTML内容失败: {html_data['error']}")
+            _record_failure(player_name, f"获取HTML内容失败: {_api_error_reason(html_data)}", permanent=True)
             return None
-            
-        # 解析HTML内容
-        soup = BeautifulSoup(html_data['parse']['text']['*'], 'html.parser')
-        
-        # 3. 获取TI数据（使用缓存）
-        if player_name in ti_cache:
-            print("使用缓存的TI数据")
-            ti_data = ti_cache[player_name]
-        else:
-            print("从API获取TI数据")
-            ti_data = get_ti_stats(player_name, session, api_url, headers)
-            if ti_data:
-                # 保存到缓存
-                ti_cache[player_name] = ti_data
-                save_cache(TI_CACHE_FILE, ti_cache)
-        
-        if ti_data:
-            player_info = {
-                'id': player_name,
-                'name': '',
-                'nationality': '',
-                'age': '',
-                'current_team': '',
-                'signature_heroes': [],
-                'role': [],
-                'history_teams': [],
-                'ti_participations': ti_data['total_participations'],
-                'ti_best_placement': ti_data['best_placement'],
-                'status': ''
-            }
+        wikitext = _page_wikitext(wikitext_cache[player_name])
+    _journal_step(player_name, STEP_WIKITEXT)
+    
+    # 2. 获取HTML内容（使用缓存）
+    if player_name in html_cache:
+        print("使用缓存的HTML内容")
+        html_data = html_cache[player_name]
+    else:
+        print("从API获取HTML内容")
+        html_data = _fetch_player_page(session, player_name)
+    
+    if 'error' in html_data:
+        _record_failure(player_name, f"获取HTML内容失败: {_api_error_reason(html_data)}", permanent=True)
+        return None
+    _journal_step(player_name, STEP_HTML)
+    
+    payload = _build_payload(player_name, wikitext, html_data)
+    
+    # 3. 获取TI数据（使用缓存），没有缓存时只获取Results页面，留到解析阶段统计
+    if TI_SOURCE == 'tournament':
+        print("从TI索引获取TI数据")
+        payload['ti_data'] = ti_index.get_ti_stats_from_index(player_name)
+    elif player_name in ti_cache:
+        print("使用缓存的TI数据")
+        payload['ti_data'] = ti_cache[player_name]
+    else:
+        print("从API获取TI数据")
+        # 现役选手的比赛结果变化快，缓存有效期较短
+        ti_ttl = ACTIVE_TI_CACHE_TTL if payload['status'].lower() == 'active' else TI_CACHE_TTL
+        payload['results_html'] = fetch_results_html(session, player_name, ti_ttl)
+    if payload['ti_data'] is not None or payload['results_html'] is not None:
+        _journal_step(player_name, STEP_RESULTS)
+    
+    return payload
+
+def _birth_date(infobox):
+    """信息框中的出生日期（按顺序使用第一个存在的字段）"""
+    birth_keys = ['birth', 'birthdate', 'birth_date', 'born']
+    return next((infobox[key] for key in birth_keys if key in infobox), None)
+
+def _player_age(birth_date):
+    """
+    按当前日期计算年龄
+    Args:
+        birth_date: 出生日期（YYYY-MM-DD，或只有年份）
+    Returns:
+        str: 年龄，没有出生日期或无法解析时为空字符串
+    """
+    if not birth_date:
+        return ''
+    try:
+        # 处理可能的日期格式
+        if '-' in birth_date:
+            birth = datetime.strptime(birth_date, '%Y-%m-%d')
         else:
-            print(f"无法获取选手 {player_name} 的TI数据")
-            return None
-        
-        # 提取基本信息
-        # 从wikitext中提取信息
-        # 提取姓名
-        name_match = re.search(r'\|\s*name\s*=\s*(.*?)(?:\n|\|)', wikitext)
-        if name_match:
-            player_info['name'] = name_match.group(1).strip()
-            
-        # 提取国籍
-        country_match = re.search(r'\|\s*country\s*=\s*(.*?)(?:\n|\|)', wikitext)
-        if country_match:
-            player_info['nationality'] = country_match.group(1).strip()
-            
-        # 提取出生日期
-        birth_patterns = [
-            r'\|\s*birth\s*=\s*(.*?)(?:\n|\|)',  # 标准格式
-            r'\|\s*birthdate\s*=\s*(.*?)(?:\n|\|)',  # birthdate格式
-            r'\|\s*birth_date\s*=\s*(.*?)(?:\n|\|)',  # birth_date格式
-            r'\|\s*born\s*=\s*(.*?)(?:\n|\|)'  # born格式
-        ]
-        
-        birth_date = None
-        for pattern in birth_patterns:
-            birth_match = re.search(pattern, wikitext)
-            if birth_match:
-                birth_date = birth_match.group(1).strip()
-                break
+            # 如果只有年份，使用1月1日
+            birth = datetime.strptime(f"{birth_date}-01-01", '%Y-%m-%d')
+    except Exception as e:
+        return ''
+    today = datetime.now()
+    return str(today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day)))
+
+def extract_player_info(payload):
+    """
+    从wikitext和HTML中提取选手信息，不发送网络请求，可在子进程中运行
+    Args:
+        payload: fetch_player_payload返回的原始数据，ti_data已统计
+    Returns:
+        dict: 选手信息，没有TI数据时返回None
+    """
+    player_name = payload['id']
+    infobox = payload['infobox']
+    ti_data = payload['ti_data']
+    
+    # 解析HTML内容（只解析到信息框结束，信息框中找不到时再解析整页）
+    page = html_backend.infobox_soup(payload['html'])
+    
+    if ti_data:
+        player_info = {
+            'id': player_name,
+            'name': '',
+            'nationality': '',
+            'age': '',
+            'current_team': '',
+            'signature_heroes': [],
+            'role': [],
+            'history_teams': [],
+            'ti_participations': ti_data['total_participations'],
+            'ti_best_placement': ti_data['best_placement'],
+            'status': payload['status']
+        }
+    else:
+        print(f"无法获取选手 {player_name} 的TI数据")
+        return None
+    
+    # 提取基本信息
+    # 从wikitext的信息框中提取信息
+    player_info['name'] = infobox.get('name', '')
+    player_info['nationality'] = infobox.get('country', '')
+    
+    # 年龄按当前日期计算，使用缓存的解析结果时重新计算
+    player_info['age'] = _player_age(_birth_date(infobox))
+    
+    # 提取位置
+    for key in ['role', 'role2', 'role3']:
+        role = infobox.get(key, '')
+        if role and role not in player_info['role']:
+            player_info['role'].append(role)
+    
+    # 提取擅长英雄
+    for key in ['hero', 'hero2', 'hero3']:
+        hero = infobox.get(key, '')
+        # 检查英雄名称是否有效（不是空字符串或特殊标记）
+        if hero and hero not in ['', '...', 'TBD'] and hero not in player_info['signature_heroes']:
+            player_info['signature_heroes'].append(hero)
                 
-        if birth_date:
-            try:
-                # 处理可能的日期格式
-                if '-' in birth_date:
-                    birth = datetime.strptime(birth_date, '%Y-%m-%d')
-                else:
-                    # 如果只有年份，使用1月1日
-                    birth = datetime.strptime(f"{birth_date}-01-01", '%Y-%m-%d')
-                today = datetime.now()
-                age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
-                player_info['age'] = str(age)
-            except Exception as e:
-                player_info['age'] = ''
-        
-        # 提取位置
-        role_patterns = [
-            r'\|\s*role\s*=\s*(.*?)(?:\n|\|)',  # 匹配 role=
-            r'\|\s*role2\s*=\s*(.*?)(?:\n|\|)', # 匹配 role2=
-            r'\|\s*role3\s*=\s*(.*?)(?:\n|\|)'  # 匹配 role3=
-        ]
-        
-        for pattern in role_patterns:
-            role_match = re.search(pattern, wikitext)
-            if role_match:
-                role = role_match.group(1).strip()
-                if role and role not in player_info['role']:
-                    player_info['role'].append(role)
-        
-        # 提取擅长英雄
-        hero_patterns = [
-            r'\|\s*hero\s*=\s*(.*?)(?:\n|\|)',  # 匹配 hero=
-            r'\|\s*hero2\s*=\s*(.*?)(?:\n|\|)', # 匹配 hero2=
-            r'\|\s*hero3\s*=\s*(.*?)(?:\n|\|)'  # 匹配 hero3=
-        ]
-        
-        for pattern in hero_patterns:
-            hero_match = re.search(pattern, wikitext)
-            if hero_match:
-                hero = hero_match.group(1).strip()
-                # 检查英雄名称是否有效（不是空字符串或特殊标记）
-                if hero and hero not in ['', '...', 'TBD'] and hero not in player_info['signature_heroes']:
-                    player_info['signature_heroes'].append(hero)
-                    
-        # 提取状态
-        status_match = re.search(r'\|\s*status\s*=\s*(.*?)(?:\n|\|)', wikitext)
-        if status_match:
-            player_info['status'] = status_match.group(1).strip()
-            
-        # 获取当前战队和历史战队信息
-        # 1. 首先尝试从wikitext获取当前战队
-        team_text = soup.find(string=lambda text: text and 'Team:' in text)
-        if team_text:
-            team_link = team_text.find_next('a')
-            if team_link:
-                player_info['current_team'] = team_link.get_text(strip=True)
-        
-        # 2. 获取历史战队信息
-        # 首先从wikitext中获取
-        print("尝试从wikitext获取历史战队...")
-        
-        # 1. 尝试从Dota 2部分获取
-        dota2_section = re.search(r"'''Dota 2''':(.*?)(?='''|$)", wikitext, re.DOTALL)
-        if dota2_section:
-            print("找到Dota 2部分")
-            # 提取所有TH模板中的战队名
-            th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', dota2_section.group(1))
-            for match in th_matches:
-                team = match.group(1).strip()
-                if team and team != '...' and team not in player_info['history_teams']:
-                    player_info['history_teams'].append(team)
-            print(f"从Dota 2部分找到的历史战队: {player_info['history_teams']}")
-        
-        # 2. 尝试从history字段获取
-        print("尝试从history字段获取...")
-        history_section = re.search(r'\|\s*history\s*=(.*?)(?:\n\||$)', wikitext, re.DOTALL)
-        if history_section:
-            print("找到history字段")
-            # 提取所有TH模板中的战队名
-            th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', history_section.group(1))
-            for match in th_matches:
-                team = match.group(1).strip()
-                if team and team != '...' and team not in player_info['history_teams']:
-                    player_info['history_teams'].append(team)
-            print(f"从history字段找到的历史战队: {player_info['history_teams']}")
-        
-        # 3. 从HTML获取历史战队（无论wikitext是否找到战队都尝试）
-        print("尝试从HTML获取历史战队...")
-        history_div = soup.find('div', string='History')
-        if history_div:
-            print("找到History div")
-            table_div = history_div.find_next('div', class_='infobox-center')
-            if table_div:
-                print("找到infobox-center div")
-                history_table = table_div.find('table')
-                if history_table:
-                    print("找到历史表格")
-                    team_links = history_table.find_all('a')
-                    for link in team_links:
-                        team_name = link.get_text(strip=True)
-                        if team_name and team_name != '...' and team_name not in player_info['history_teams']:
-                            player_info['history_teams'].append(team_name)
-                    print(f"从HTML中找到的历史战队: {player_info['history_teams']}")
-                else:
-                    print("未找到历史表格")
-            else:
-                print("未找到infobox-center div")
-        else:
-            print("未找到History div")
-        
-        # 4. 如果历史战队为空，尝试从THA模板获取
-        if not player_info['history_teams']:
-            print("尝试从THA模板获取历史战队...")
-            try:
-                history_params = {
-                    'action': 'expandtemplates',
-                    'format': 'json',
-                    'text': f'{{{{THA|{player_name}}}}}',
-                    'prop': 'wikitext'
-                }
+    # 获取当前战队和历史战队信息
+    # 1. 首先尝试从wikitext获取当前战队
+    team_link = page.lookup(html_backend.find_team_link, html_backend.TEAM_MARKER)
+    if team_link:
+        player_info['current_team'] = team_link.get_text(strip=True)
+    
+    # 2. 获取历史战队信息
+    # 首先从wikitext中获取
+    print("尝试从wikitext获取历史战队...")
+    
+    history = infobox.get('history')
+    
+    # 1. 尝试从history字段中的Dota 2部分获取（选手同时有其它游戏的经历时）
+    #    信息框没有history字段时在整页wikitext中查找（此时已获取完整页面）
+    dota2_section = re.search(r"'''Dota 2''':(.*?)(?='''|$)", payload['wikitext'] if history is None else history, re.DOTALL)
+    if dota2_section:
+        print("找到Dota 2部分")
+        # 提取所有TH模板中的战队名
+        th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', dota2_section.group(1))
+        for match in th_matches:
+            team = match.group(1).strip()
+            if team and team != '...' and team not in player_info['history_teams']:
+                player_info['history_teams'].append(team)
+        print(f"从Dota 2部分找到的历史战队: {player_info['history_teams']}")
+    
+    # 2. 尝试从history字段获取
+    print("尝试从history字段获取...")
+    if history is not None:
+        print("找到history字段")
+        # 提取所有TH模板中的战队名
+        th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', history)
+        for match in th_matches:
+            team = match.group(1).strip()
+            if team and team != '...' and team not in player_info['history_teams']:
+                player_info['history_teams'].append(team)
+        print(f"从history字段找到的历史战队: {player_info['history_teams']}")
+    
+    # 3. 从HTML获取历史战队（无论wikitext是否找到战队都尝试）
+    print("尝试从HTML获取历史战队...")
+    history_table = page.lookup(html_backend.find_history_table, html_backend.HISTORY_MARKER)
+    if history_table:
+        print("找到历史表格")
+        team_links = history_table.find_all('a')
+        for link in team_links:
+            team_name = link.get_text(strip=True)
+            if team_name and team_name != '...' and team_name not in player_info['history_teams']:
+                player_info['history_teams'].append(team_name)
+        print(f"从HTML中找到的历史战队: {player_info['history_teams']}")
+    else:
+        print("未找到历史表格")
+    
+    return player_info
+
+def _player_templates(player_name):
+    """补充战队信息时展开的模板"""
+    return [f'{{{{THA|{player_name}}}}}', f'{{{{PlayerTeamAuto|{player_name}}}}}']
+
+def _expand_template(session, text):
+    """
+    展开模板（使用缓存）
+    Args:
+        session: requests session，为None时只使用缓存，不发送请求
+        text: 模板文本
+    Returns:
+        str: 展开后的wikitext，没有结果时为空字符串
+    """
+    if text in template_cache:
+        return template_cache[text]
+    if session is None:
+        # 离线时已过期的展开结果也可以使用
+        return template_cache.get(text, '', include_expired=True)
+    
+    expand_params = {
+        'action': 'expandtemplates',
+        'format': 'json',
+        'text': text,
+        'prop': 'wikitext'
+    }
+    
+    wikitext = _api_get(session, expand_params).get('expandtemplates', {}).get('wikitext', '')
+    template_cache[text] = wikitext
+    save_cache(TEMPLATE_CACHE_FILE, template_cache)
+    return wikitext
+
+def fill_missing_teams(session, player_info):
+    """
+    页面中没有找到历史战队或当前战队时，通过展开模板补充（需要请求API）
+    Args:
+        session: requests session，为None时只使用缓存的模板展开结果
+        player_info: extract_player_info返回的选手信息，直接修改
+    Returns:
+        dict: 选手信息
+    """
+    tha_template, team_template = _player_templates(player_info['id'])
+    
+    # 1. 如果历史战队为空，尝试从THA模板获取
+    if not player_info['history_teams']:
+        print("尝试从THA模板获取历史战队...")
+        try:
+            # 解析历史战队模板内容
+            history_wikitext = _expand_template(session, tha_template)
+            if history_wikitext:
+                print("获取到THA模板内容")
+                print(f"THA模板原始内容: {history_wikitext}")
                 
-                response = session.get(api_url, params=history_params, headers=headers)
-                response.raise_for_status()
-                history_data = response.json()
+                # 使用正则表达式提取所有战队
+                # 1. 尝试匹配 team= 格式
+                team_matches = re.finditer(r'team\d*\s*=\s*(.*?)(?:\n|\|)', history_wikitext)
+                for match in team_matches:
+                    team = match.group(1).strip()
+                    if team and team != '...' and team not in player_info['history_teams']:
+                        player_info['history_teams'].append(team)
                 
-                # 解析历史战队模板内容
-                history_wikitext = history_data.get('expandtemplates', {}).get('wikitext', '')
-                if history_wikitext:
-                    print("获取到THA模板内容")
-                    print(f"THA模板原始内容: {history_wikitext}")
-                    
-                    # 使用正则表达式提取所有战队
-                    # 1. 尝试匹配 team= 格式
-                    team_matches = re.finditer(r'team\d*\s*=\s*(.*?)(?:\n|\|)', history_wikitext)
-                    for match in team_matches:
+                # 2. 尝试匹配 {{TH|...}} 格式
+                if not player_info['history_teams']:
+                    print("尝试匹配 {{TH|...}} 格式")
+                    th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', history_wikitext)
+                    for match in th_matches:
                         team = match.group(1).strip()
                         if team and team != '...' and team not in player_info['history_teams']:
                             player_info['history_teams'].append(team)
-                    
-                    # 2. 尝试匹配 {{TH|...}} 格式
-                    if not player_info['history_teams']:
-                        print("尝试匹配 {{TH|...}} 格式")
-                        th_matches = re.finditer(r'\{\{TH\|[^|]*\|([^|}]+)', history_wikitext)
-                        for match in th_matches:
-                            team = match.group(1).strip()
-                            if team and team != '...' and team not in player_info['history_teams']:
-                                player_info['history_teams'].append(team)
-                    
-                    print(f"从THA模板中找到的历史战队: {player_info['history_teams']}")
-                else:
-                    print("THA模板内容为空")
-            except Exception as e:
-                print(f"获取THA模板信息时出错: {str(e)}")
-        
-        # 等待1秒，遵守API限制
-        time.sleep(1)
-        
-        # 3. 如果当前战队为空，尝试使用PlayerTeamAuto模板获取
-        if not player_info['current_team']:
-            try:
-                # 获取展开后的模板内容
-                expand_params = {
-                    'action': 'expandtemplates',
-                    'format': 'json',
-                    'text': f'{{{{PlayerTeamAuto|{player_name}}}}}',
-                    'prop': 'wikitext'
-                }
-                
-                response = session.get(api_url, params=expand_params, headers=headers)
-                response.raise_for_status()
-                team_data = response.json()
                 
-                # 解析模板内容获取当前战队
-                team_wikitext = team_data.get('expandtemplates', {}).get('wikitext', '')
-                if team_wikitext:
-                    # 尝试从模板内容中提取当前战队
-                    team_match = re.search(r'team\s*=\s*(.*?)(?:\n|\|)', team_wikitext)
-                    if team_match:
-                        current_team = team_match.group(1).strip()
-                        if current_team and current_team != '...':
-                            player_info['current_team'] = current_team
-            except Exception as e:
-                print(f"获取当前战队信息时出错: {str(e)}")
+                print(f"从THA模板中找到的历史战队: {player_info['history_teams']}")
+            else:
+                print("THA模板内容为空")
+        except Exception as e:
+            print(f"获取THA模板信息时出错: {str(e)}")
+    
+    # 2. 如果当前战队为空，尝试使用PlayerTeamAuto模板获取
+    if not player_info['current_team']:
+        try:
+            # 解析模板内容获取当前战队
+            team_wikitext = _expand_template(session, team_template)
+            if team_wikitext:
+                # 尝试从模板内容中提取当前战队
+                team_match = re.search(r'team\s*=\s*(.*?)(?:\n|\|)', team_wikitext)
+                if team_match:
+                    current_team = team_match.group(1).strip()
+                    if current_team and current_team != '...':
+                        player_info['current_team'] = current_team
+        except Exception as e:
+            print(f"获取当前战队信息时出错: {str(e)}")
+    
+    return player_info
+
+def parse_player_payload(payload):
+    """
+    解析阶段：统计Results页面中的TI数据并提取选手信息，不发送网络请求，可在子进程中运行
+    Args:
+        payload: fetch_player_payload返回的原始数据
+    Returns:
+        tuple: (TI数据, 选手信息)
+    """
+    ti_data = payload['ti_data']
+    if payload['results_html'] is not None:
+        ti_data = parse_ti_results(payload['results_html'])
+    return ti_data, extract_player_info({**payload, 'ti_data': ti_data})
+
+def finish_player_info(session, payload, ti_data, player_info):
+    """
+    解析完成后在主进程中保存TI数据缓存，并补充需要请求API的战队信息
+    Args:
+        session: requests session
+        payload: fetch_player_payload返回的原始数据
+        ti_data: parse_player_payload统计的TI数据
+        player_info: parse_player_payload提取的选手信息
+    Returns:
+        dict: 选手信息，获取失败时返回None
+    """
+    if payload['results_html'] is not None:
+        # 保存到缓存，现役选手的比赛结果变化快，缓存有效期较短
+        ti_ttl = ACTIVE_TI_CACHE_TTL if payload['status'].lower() == 'active' else TI_CACHE_TTL
+        if ti_data:
+            ti_cache.set(payload['id'], ti_data, ttl=ti_ttl)
+            save_cache(TI_CACHE_FILE, ti_cache)
+        else:
+            save_negative_cache(TI_CACHE_FILE, ti_cache, payload['id'], None, '未找到比赛结果表格')
+    if player_info is None:
+        # 获取Results页面时已经记录了更具体的原因时不覆盖；否则是Results页面没有比赛结果表格
+        # 或命中了负缓存，重试也不会成功
+        if payload['id'] not in failure_reasons:
+            _record_failure(payload['id'], f"无法获取选手 {payload['id']} 的TI数据", permanent=True)
+        return None
+    save_parsed_record(payload['id'], player_info, _birth_date(payload['infobox']))
+    _journal_step(payload['id'], STEP_EXTRACTED)
+    return fill_missing_teams(session, player_info)
+
+def get_player_full_info(player_name):
+    """
+    获取选手的完整信息
+    Args:
+        player_name: 选手ID
+    Returns:
+        dict: 包含选手完整信息的字典
+    """
+    session = http_client.get_session()
+    _clear_failure(player_name)
+    
+    try:
+        player_info = load_parsed_record(player_name)
+        if player_info is not None:
+            print("使用缓存的解析结果")
+            return fill_missing_teams(session, player_info)
         
-        return player_info
+        payload = fetch_player_payload(session, player_name)
+        if payload is None:
+            return None
+        ti_data, player_info = parse_player_payload(payload)
+        return finish_player_info(session, payload, ti_data, player_info)
         
     except Exception as e:
-        print(f"Error: {str(e)}")
+        _record_failure(player_name, f"Error: {str(e)}")
         return None
-    finally:
-        session.close()
 
-def get_ti_stats(player_name, session, api_url, headers):
+def fetch_results_html(session, player_name, ttl=TI_CACHE_TTL):
     """
-    获取选手的TI参赛数据
+    获取选手Results页面的HTML并立即写入缓存，页面不存在时写入负缓存
+    获取后马上缓存，解析前中断时重新运行不需要再次请求
+    Args:
+        session: requests session
+        player_name: 选手ID
+        ttl: 缓存有效期
+    Returns:
+        str: Results页面HTML，获取失败时返回None
     """
+    if player_name in results_cache:
+        print("使用缓存的Results页面")
+        return results_cache[player_name]
     try:
-        # 获取Results页面内容
         content_params = {
             'action': 'parse',
             'format': 'json',
@@ -439,134 +813,433 @@ def get_ti_stats(player_name, session, api_url, headers):
             'prop': 'text'
         }
         
-        start_time = time.time()
-        retry_count = 0
-        while True:
-            try:
-                response = session.get(api_url, params=content_params, headers=headers)
-                response.raise_for_status()
-                content_data = response.json()
-                break
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:  # Too Many Requests
-                    retry_count += 1
-                    wait_time = 3600  # 1小时
-                    print(f"\n遇到请求限制，第{retry_count}次自动重试...")
-                    print(f"将在{wait_time/60:.0f}分钟后自动重试")
-                    time.sleep(wait_time)
+        content_data = _api_get(session, content_params)
+    except Exception as e:
+        _record_failure(player_name, f"Error getting TI stats: {str(e)}")
+        return None
+    
+    if 'error' in content_data:
+        # Results页面不存在，缓存结果避免重复请求
+        save_negative_cache(TI_CACHE_FILE, ti_cache, player_name, None, _api_error_reason(content_data))
+        _record_failure(player_name, f"获取Results页面失败: {_api_error_reason(content_data)}", permanent=True)
+        return None
+    
+    page_content = content_data['parse']['text']['*']
+    results_cache.set(player_name, page_content, ttl=ttl)
+    save_cache(RESULTS_CACHE_FILE, results_cache)
+    return page_content
+
+def parse_ti_results(page_content):
+    """
+    从Results页面HTML统计TI参赛数据，不发送网络请求，可在子进程中运行
+    Args:
+        page_content: Results页面HTML
+    Returns:
+        dict: {'total_participations': 参赛次数, 'best_placement': 最好名次}，未找到比赛结果表格时返回None
+    """
+    rows = results_table.parse_results_table(page_content)
+    if rows is None:
+        return None
+    return results_table.ti_summary(rows)
+
+def get_ti_stats(player_name, session):
+    """
+    获取选手的TI参赛数据
+    """
+    page_content = fetch_results_html(session, player_name)
+    if page_content is None:
+        return None
+    try:
+        ti_data = parse_ti_results(page_content)
+    except Exception as e:
+        print(f"Error getting TI stats: {str(e)}")
+        return None
+    if not ti_data:
+        save_negative_cache(TI_CACHE_FILE, ti_cache, player_name, None, '未找到比赛结果表格')
+    return ti_data
+
+# 解析结果依赖的模块（整个模块的源码，包括常量和正则表达式），任一模块变化后缓存的解析结果失效
+EXTRACTOR_MODULES = [inspect.getmodule(parse_infobox), html_backend, results_table]
+EXTRACTOR_FUNCTIONS = [_page_wikitext, _build_payload, parse_player_payload, extract_player_info, _birth_date, _player_age,
+                       parse_ti_results]
+
+def extractor_version():
+    """解析代码的版本：EXTRACTOR_MODULES和EXTRACTOR_FUNCTIONS源码以及HTML解析器的哈希"""
+    global _extractor_version
+    if _extractor_version is None:
+        digest = hashlib.sha1()
+        for source in EXTRACTOR_MODULES + EXTRACTOR_FUNCTIONS:
+            digest.update(inspect.getsource(source).encode('utf-8'))
+        # 不同的HTML解析器对不规范的HTML可能得到不同的结果
+        digest.update(html_backend.HTML_PARSER.encode('utf-8'))
+        _extractor_version = digest.hexdigest()[:12]
+    return _extractor_version
+
+def _record_key(player_name, include_expired=False):
+    """
+    解析结果缓存的版本键：(选手页面版本, Results页面版本, 输入数据的过期时间, 解析代码版本)
+    页面版本来自refresh_changed_pages记录的revid和touched；wikitext、HTML和TI数据缓存有各自的有效期
+    （现役选手的TI数据只有1天），其中任一条过期或重新获取后，缓存的解析结果随之失效
+    Args:
+        player_name: 选手ID
+        include_expired: 是否使用已过期的版本记录和输入数据
+    Returns:
+        tuple: 版本键，没有记录过页面版本、输入数据已过期或TI数据来自TI索引时返回None，不使用缓存
+    """
+    if TI_SOURCE != 'results':
+        return None
+    page_rev = revision_cache.get(player_name, include_expired=include_expired)
+    results_rev = revision_cache.get(f"{player_name}/Results", include_expired=include_expired)
+    if not page_rev or not results_rev:
+        return None
+    try:
+        expires_at = tuple(cache.expires_at(player_name, include_expired)
+                           for cache in (wikitext_cache, html_cache, ti_cache))
+    except KeyError:
+        return None
+    return (page_rev['revid'], page_rev['touched'], results_rev['revid'], results_rev['touched'],
+            expires_at, extractor_version())
+
+def load_parsed_record(player_name, include_expired=False):
+    """
+    获取缓存的解析结果（尚未补充模板中的战队信息）
+    Args:
+        player_name: 选手ID
+        include_expired: 是否使用已过期的缓存（离线重新解析时为True）
+    Returns:
+        dict: 选手信息的副本（年份按当前日期重新计算），页面或解析代码有变化时返回None
+    """
+    key = _record_key(player_name, include_expired)
+    if key is None:
+        return None
+    record = record_cache.get(player_name, include_expired=include_expired)
+    if not record or record['key'] != key:
+        return None
+    player_info = copy.deepcopy(record['player_info'])
+    player_info['age'] = _player_age(record['birth_date'])
+    return player_info
+
+def save_parsed_record(player_name, player_info, birth_date):
+    """
+    保存解析结果，应在补充模板中的战队信息之前调用
+    Args:
+        player_name: 选手ID
+        player_info: extract_player_info提取的选手信息
+        birth_date: 信息框中的出生日期，读取缓存时用来重新计算年龄
+    """
+    key = _record_key(player_name)
+    if key is None:
+        return
+    record_cache[player_name] = {'key': key, 'player_info': copy.deepcopy(player_info), 'birth_date': birth_date}
+    save_cache(RECORD_CACHE_FILE, record_cache)
+
+async def get_player_full_info_async(player_name):
+    """
+    get_player_full_info的异步版本，在线程池中执行，不阻塞事件循环
+    限速器按action分桶且线程安全，多个选手同时处理时会交错使用各类请求的额度
+    Args:
+        player_name: 选手ID
+    Returns:
+        dict: 与get_player_full_info相同
+    """
+    return await asyncio.to_thread(get_player_full_info, player_name)
+
+async def crawl_players_async(player_names, concurrency=4, on_result=None):
+    """
+    同时处理多个选手，某个选手等待parse额度时，其它选手的缓存命中和query请求照常进行
+    Args:
+        player_names: 选手ID列表
+        concurrency: 同时处理的选手数量
+        on_result: 每个选手处理完成后调用 on_result(选手ID, 选手信息)
+    Returns:
+        dict: 选手ID -> 选手信息（获取失败为None），按输入顺序排列
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def crawl(player_name):
+        async with semaphore:
+            player_info = await get_player_full_info_async(player_name)
+        if on_result:
+            on_result(player_name, player_info)
+        return player_info
+    
+    player_infos = await asyncio.gather(*(crawl(name) for name in player_names))
+    return dict(zip(player_names, player_infos))
+
+def iter_player_full_info(player_names, concurrency=1):
+    """
+    按完成顺序逐个返回选手信息，concurrency大于1时在后台线程中运行异步抓取
+    Args:
+        player_names: 选手ID列表
+        concurrency: 同时处理的选手数量
+    Yields:
+        tuple: (选手ID, 选手信息)
+    """
+    if concurrency <= 1:
+        for player_name in player_names:
+            yield player_name, get_player_full_info(player_name)
+        return
+    
+    results = queue.Queue()
+    done = object()
+    
+    def run():
+        try:
+            asyncio.run(crawl_players_async(player_names, concurrency, lambda *result: results.put(result)))
+        finally:
+            results.put(done)
+    
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        result = results.get()
+        if result is done:
+            break
+        yield result
+
+def iter_player_full_info_pipeline(player_names, workers=None, queue_size=PARSE_QUEUE_SIZE):
+    """
+    网络请求和解析分开执行：后台线程依次获取原始数据放入有界队列，
+    进程池从队列取出数据解析，解析耗时不会推迟下一个请求
+    Args:
+        player_names: 选手ID列表
+        workers: 解析进程数，默认为CPU核数
+        queue_size: 等待解析的选手数量上限
+    Yields:
+        tuple: (选手ID, 选手信息)，按解析完成顺序返回
+    """
+    workers = workers or os.cpu_count() or 1
+    payloads = queue.Queue(maxsize=queue_size)
+    done = object()
+    
+    def fetch_all():
+        session = http_client.get_session()
+        try:
+            for player_name in player_names:
+                _clear_failure(player_name)
+                try:
+                    player_info = load_parsed_record(player_name)
+                    if player_info is not None:
+                        # 页面和解析代码都没有变化，不需要解析
+                        payloads.put((player_name, {'parsed': player_info}))
+                        continue
+                    payload = fetch_player_payload(session, player_name)
+                except Exception as e:
+                    _record_failure(player_name, f"Error: {str(e)}")
+                    payload = None
+                payloads.put((player_name, payload))
+        finally:
+            payloads.put(done)
+    
+    # 用spawn启动解析进程，避免在已有后台线程时fork
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    session = http_client.get_session()
+    threading.Thread(target=fetch_all, daemon=True).start()
+    try:
+        pending = {}
+        fetching = True
+        while fetching or pending:
+            # 有空闲的解析进程时从队列取下一个选手，没有正在解析的选手时等待网络请求
+            while fetching and len(pending) < workers:
+                try:
+                    item = payloads.get(block=not pending)
+                except queue.Empty:
+                    break
+                if item is done:
+                    fetching = False
+                    break
+                player_name, payload = item
+                if payload is None:
+                    yield player_name, None
                     continue
-                raise
-            except Exception as e:
-                print(f"Error getting TI stats: {str(e)}")
-                return None
-        
-        if 'error' in content_data:
-            return None
-            
-        # 获取页面内容
-        page_content = content_data['parse']['text']['*']
-        soup = BeautifulSoup(page_content, 'html.parser')
-        
-        # 找到比赛结果表格
-        table = soup.find('table', {'class': 'wikitable'})
-        if not table:
-            return None
-        
-        # 解析TI参赛情况
-        ti_data = {
-            'total_participations': 0,
-            'best_placement': ''
-        }
-        
-        # 用于记录已经统计过的TI年份
-        ti_years = set()
-        
-        # 遍历表格行
-        for row in table.find_all('tr')[1:]:  # 跳过表头
-            # 检查是否是高亮行（TI比赛通常会有特殊背景）
-            is_highlighted = 'tournament-highlighted-bg' in row.get('class', [])
-            
-            cols = row.find_all('td')
-            if len(cols) < 8:  # 确保有足够的列
-                continue
-            
-            # 获取比赛名称
-            tournament_cell = cols[4]
-            tournament_link = tournament_cell.find('a')
-            if not tournament_link:
-                continue
-                
-            tournament_text = tournament_link.text.strip()
+                if 'parsed' in payload:
+                    yield player_name, fill_missing_teams(session, payload['parsed'])
+                    continue
+                pending[executor.submit(parse_player_payload, payload)] = (player_name, payload)
             
-            # 使用正则表达式匹配TI正赛（排除预选赛）
-            if 'Qualifier' in tournament_text:
-                continue
-                
-            ti_match = re.search(r'The International (\d{4})', tournament_text)
-            if not ti_match:
+            if not pending:
                 continue
-                
-            year = ti_match.group(1)
-            
-            # 检查是否已经统计过这一年的TI
-            if year not in ti_years:
-                ti_years.add(year)
-                ti_data['total_participations'] += 1
-                
-                # 获取名次
-                placement_cell = cols[1]
-                placement = placement_cell.find('b', class_='placement-text')
-                if placement:
-                    place = placement.text.strip()
-                else:
-                    place = placement_cell.text.strip()
-                
-                # 更新最好名次
-                if not ti_data['best_placement'] or _is_better_placement(place, ti_data['best_placement']):
-                    ti_data['best_placement'] = place
-        
-        return ti_data
-        
-    except Exception as e:
-        print(f"Error getting TI stats: {str(e)}")
+            finished, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in finished:
+                player_name, payload = pending.pop(future)
+                try:
+                    ti_data, player_info = future.result()
+                    player_info = finish_player_info(session, payload, ti_data, player_info)
+                except Exception as e:
+                    _record_failure(player_name, f"Error: {str(e)}")
+                    player_info = None
+                yield player_name, player_info
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def load_cached_payload(player_name):
+    """
+    只从缓存组装解析所需的原始数据，不发送任何网络请求
+    优先使用缓存的Results页面重新统计TI数据，没有时使用缓存的TI统计结果
+    离线解析不会重新获取数据，已过期的缓存也照常使用
+    Args:
+        player_name: 选手ID
+    Returns:
+        dict: 与fetch_player_payload格式一致，缓存不完整时返回None
+    """
+    wikitext_data = wikitext_cache.get(player_name, include_expired=True)
+    html_data = html_cache.get(player_name, include_expired=True)
+    if not wikitext_data or not html_data or 'error' in html_data:
         return None
+    wikitext = _page_wikitext(wikitext_data)
+    if wikitext is None:
+        return None
+    
+    payload = _build_payload(player_name, wikitext, html_data)
+    results_html = results_cache.get(player_name, include_expired=True)
+    ti_data = ti_cache.get(player_name, include_expired=True)
+    if results_html is not None:
+        payload['results_html'] = results_html
+    elif ti_data:
+        payload['ti_data'] = ti_data
+    else:
+        return None
+    return payload
 
-def _is_better_placement(place1, place2):
+def reparse_from_cache(player_names, workers=None):
     """
-    比较两个名次，判断place1是否比place2更好
+    离线重新解析：只使用缓存的wikitext、HTML、Results页面和模板展开结果，
+    用进程池并行提取选手信息，不发送网络请求也不等待限速
+    Args:
+        player_names: 选手ID列表
+        workers: 解析进程数，默认为CPU核数
+    Returns:
+        tuple: (选手信息列表（按输入顺序）, 缓存不完整或解析失败的选手ID列表)
     """
-    def get_numeric_placement(place):
-        # 提取数字部分
-        match = re.search(r'(\d+)(?:st|nd|rd|th)?', place)
-        if match:
-            return int(match.group(1))
-        return float('inf')
+    parsed = {}
+    payloads = []
+    failed_ids = []
+    for player_name in player_names:
+        # 页面和解析代码都没有变化的选手直接使用缓存的解析结果
+        player_info = load_parsed_record(player_name, include_expired=True)
+        if player_info is not None:
+            parsed[player_name] = player_info
+            continue
+        payload = load_cached_payload(player_name)
+        if payload is None:
+            failed_ids.append(player_name)
+        else:
+            payloads.append(payload)
+    print(f"{len(parsed)} 个选手使用缓存的解析结果，{len(payloads)} 个选手需要重新解析")
+    
+    if payloads:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(payloads) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            for payload, (ti_data, player_info) in zip(payloads, executor.map(parse_player_payload, payloads, chunksize=chunksize)):
+                if player_info is None:
+                    failed_ids.append(payload['id'])
+                    continue
+                save_parsed_record(payload['id'], player_info, _birth_date(payload['infobox']))
+                parsed[payload['id']] = player_info
     
-    return get_numeric_placement(place1) < get_numeric_placement(place2)
+    all_players_info = [fill_missing_teams(None, parsed[name]) for name in player_names if name in parsed]
+    return all_players_info, failed_ids
+
+def print_negative_report():
+    """打印负缓存报告：已知不存在或请求出错的页面，重新运行时不会再请求"""
+    caches = [('选手页面wikitext', wikitext_cache), ('选手页面HTML', html_cache), ('Results页面', ti_cache)]
+    for label, cache in caches:
+        negatives = cache.negatives()
+        if not negatives:
+            continue
+        print(f"\n{label}负缓存 {len(negatives)} 条:")
+        for key, reason, expires_at in negatives:
+            expires = datetime.fromtimestamp(expires_at).strftime('%Y-%m-%d %H:%M')
+            print(f"  {key}: {reason}（{expires} 后重新请求）")
+
+def reparse_main(parse_workers=None):
+    """
+    reparse命令：修改解析代码后，用缓存重新生成all_players.txt中所有选手的输出文件
+    Args:
+        parse_workers: 解析进程数
+    """
+    try:
+        with open("all_players.txt", "r", encoding="utf-8") as f:
+            player_ids = [unquote(line.strip()) for line in f if line.strip()]
+    except FileNotFoundError:
+        print("错误：找不到 all_players.txt 文件")
+        sys.exit(1)
+    
+    print(f"从缓存重新解析 {len(player_ids)} 个选手...")
+    start_time = time.time()
+    all_players_info, failed_ids = reparse_from_cache(player_ids, parse_workers)
+    
+    output_dir = "output"
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = os.path.join(output_dir, f"all_players_info_{timestamp}.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_players_info, f, ensure_ascii=False, indent=4)
+    
+    print(f"\n重新解析完成，用时 {time.time() - start_time:.1f} 秒，共 {len(all_players_info)} 个选手，已保存到 {output_file}")
+    if failed_ids:
+        print(f"{len(failed_ids)} 个选手缓存不完整或解析失败，需要重新运行抓取:")
+        for player_id in failed_ids:
+            print(f"  {player_id}")
 
 if __name__ == "__main__":
     # 测试模式：只处理几个特定的选手
     TEST_MODE = False
     
+    # --tournament-ti：从历届TI页面建立索引获取TI数据，不再逐个请求Results页面
+    if '--tournament-ti' in sys.argv:
+        TI_SOURCE = 'tournament'
+    # --concurrency N：同时处理N个选手（默认逐个处理）
+    concurrency = 1
+    if '--concurrency' in sys.argv:
+        concurrency = int(sys.argv[sys.argv.index('--concurrency') + 1])
+    # --refresh：检查all_players.txt中所有选手的页面版本，页面或Results有更新的已处理选手重新抓取
+    refresh = '--refresh' in sys.argv
+    # --parse-workers N：网络请求和解析分开，用N个进程并行解析（N为0时使用全部CPU核）
+    parse_workers = None
+    if '--parse-workers' in sys.argv:
+        parse_workers = int(sys.argv[sys.argv.index('--parse-workers') + 1])
+    
+    # reparse：只用缓存重新解析所有选手，不请求网络
+    if len(sys.argv) > 1 and sys.argv[1] == 'reparse':
+        reparse_main(parse_workers)
+        sys.exit(0)
+    
     # 创建output文件夹（如果不存在）
     output_dir = "output"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    # 检查是否存在之前的输出文件，用于获取已处理的选手ID
-    existing_files = [f for f in os.listdir(output_dir) if f.startswith("all_players_info_") and f.endswith(".json")]
-    processed_ids = set()
-    if existing_files:
-        # 从最新的文件中读取已处理的选手ID
-        latest_file = max(existing_files)
-        with open(os.path.join(output_dir, latest_file), 'r', encoding='utf-8') as f:
-            processed_data = json.load(f)
-            processed_ids = {player['id'] for player in processed_data}
-        print(f"从 {latest_file} 中读取了 {len(processed_ids)} 个已处理的选手ID")
-    
-    # 创建新的输出文件
+    # 打开进度日志，已写入输出文件的选手不再处理，处理到一半的选手从缓存中已有的数据继续
+    crawl_journal = CrawlJournal(JOURNAL_FILE)
+    if not crawl_journal.steps:
+        # 还没有进度日志时，从最新的输出文件中读取已处理的选手ID（中途崩溃时只有.jsonl文件）
+        existing_files = [f for f in os.listdir(output_dir) if f.startswith("all_players_info_") and f.endswith((".json", ".jsonl"))]
+        if existing_files:
+            latest_file = max(existing_files)
+            latest_path = os.path.join(output_dir, latest_file)
+            if latest_file.endswith(".jsonl"):
+                processed_data = list(read_jsonl(latest_path))
+            else:
+                with open(latest_path, 'r', encoding='utf-8') as f:
+                    processed_data = json.load(f)
+            for player in processed_data:
+                crawl_journal.mark(player['id'], STEP_WRITTEN)
+            print(f"从 {latest_file} 中读取了 {len(processed_data)} 个已处理的选手ID")
+    processed_ids = crawl_journal.players_with(STEP_WRITTEN)
+    if processed_ids:
+        # 没有进度日志时会从最新的输出文件中读取已处理的选手，只删除进度日志不会重新处理
+        print(f"进度日志 {JOURNAL_FILE} 中有 {len(processed_ids)} 个已处理的选手"
+              f"（同时删除该文件和 {output_dir} 中的 all_players_info_* 文件可重新处理全部选手，"
+              f"--refresh 只重新抓取页面有更新的选手）")
+    in_progress = crawl_journal.in_progress()
+    if in_progress:
+        print(f"{len(in_progress)} 个选手上次处理到一半，将从已完成的步骤继续")
+    
+    # 创建新的输出文件：处理过程中逐条追加到.jsonl文件，结束时整理为.json文件
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = os.path.join(output_dir, f"all_players_info_{timestamp}.json")
+    stream_file = os.path.join(output_dir, f"all_players_info_{timestamp}.jsonl")
     log_file = os.path.join(output_dir, f"empty_history_teams_{timestamp}.log")
     error_log_file = os.path.join(output_dir, f"error_players_{timestamp}.log")
     
@@ -578,76 +1251,134 @@ if __name__ == "__main__":
         print("错误：找不到 all_players.txt 文件")
         sys.exit(1)
     
+    if refresh:
+        # 检查所有选手的页面版本，有更新的已处理选手重新抓取，没有更新的保留之前的输出
+        changed = [name for name in refresh_changed_pages([unquote(pid) for pid in player_ids]) if name in processed_ids]
+        for name in changed:
+            crawl_journal.reset(name)
+            processed_ids.discard(name)
+        print(f"{len(changed)} 个已处理的选手页面有更新，将重新抓取")
+    
     # 过滤掉已经处理过的选手
-    player_ids = [pid for pid in player_ids if pid not in processed_ids]
+    player_ids = [pid for pid in player_ids if unquote(pid) not in processed_ids]
     
     print(f"待处理选手数量: {len(player_ids)}")
+    if not player_ids:
+        # 不创建空的输出文件，否则下次运行会从空文件中读取已处理的选手
+        crawl_journal.close()
+        print("没有需要处理的选手")
+        sys.exit(0)
+    
+    # 只重新获取页面有更新的选手（--refresh时已检查过），然后批量预取wikitext，后续逐个处理时直接命中缓存
+    if not refresh:
+        refresh_changed_pages([unquote(pid) for pid in player_ids])
+    prefetch_wikitext([unquote(pid) for pid in player_ids])
+    
+    # 逐条写入选手信息
+    writer = JsonlWriter(stream_file)
+    # 处理失败的选手放入死信队列，抓取不中断，结束后按退避时间重试
+    dead_letters = DeadLetterQueue()
+    
+    def save_player(decoded_id, player_info):
+        """
+        保存一个选手的处理结果：成功时写入输出文件，失败时放入死信队列
+        Args:
+            decoded_id: 选手ID
+            player_info: get_player_full_info的返回值
+        Returns:
+            tuple: (是否成功, 失败原因, 是否为重试也不会成功的失败)
+        """
+        if not player_info:
+            reason = failure_reasons.pop(decoded_id, '未知原因')
+            permanent = decoded_id in permanent_failures
+            permanent_failures.discard(decoded_id)
+            print(f"无法获取选手 {decoded_id} 的信息: {reason}")
+            # 记录错误到日志文件
+            with open(error_log_file, "a", encoding="utf-8") as f:
+                f.write(f"选手ID: {decoded_id}\n")
+                f.write(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"原因: {reason}\n")
+                f.write("-" * 50 + "\n")
+            crawl_journal.mark(decoded_id, STEP_FAILED)
+            print(f"错误已记录到: {error_log_file}")
+            return False, reason, permanent
+        
+        # 将选手信息追加到输出文件
+        writer.write(player_info)
+        crawl_journal.mark(decoded_id, STEP_WRITTEN)
+        # 正常处理或重试成功后都移出死信队列，之前的失败次数不再保留
+        dead_letters.remove(decoded_id)
+        
+        # 打印基本信息
+        print(f"姓名: {player_info['name']}")
+        print(f"国籍: {player_info['nationality']}")
+        print(f"当前战队: {player_info['current_team']}")
+        print(f"历史战队: {', '.join(player_info['history_teams'])}")
+        print(f"TI参赛次数: {player_info['ti_participations']}")
+        print(f"TI最好成绩: {player_info['ti_best_placement']}")
+        
+        # 如果历史战队为空，记录到日志文件
+        if not player_info['history_teams']:
+            with open(log_file, "a", encoding="utf-8") as f:
+                f.write(f"选手ID: {decoded_id}\n")
+                f.write(f"姓名: {player_info['name']}\n")
+                f.write(f"国籍: {player_info['nationality']}\n")
+                f.write(f"当前战队: {player_info['current_team']}\n")
+                f.write(f"TI参赛次数: {player_info['ti_participations']}\n")
+                f.write(f"TI最好成绩: {player_info['ti_best_placement']}\n")
+                f.write("-" * 50 + "\n")
+            print(f"历史战队为空，已记录到日志文件")
+        
+        print(f"已保存当前进度到 {stream_file}")
+        return True, '', False
     
-    # 存储所有选手信息的列表
-    all_players_info = []
+    def retry_player(decoded_id):
+        """重试死信队列中的选手"""
+        return save_player(decoded_id, get_player_full_info(decoded_id))
     
     try:
-        # 处理每个选手
-        for i, player_id in enumerate(player_ids, 1):
-            # URL解码选手ID
-            decoded_id = unquote(player_id)
-            print(f"\n处理第 {i}/{len(player_ids)} 个选手: {decoded_id}")
-            
-            # 获取选手完整信息
-            player_info = get_player_full_info(decoded_id)
-            
-            if player_info:
-                # 将选手信息添加到列表中
-                all_players_info.append(player_info)
-                
-                # 打印基本信息
-                print(f"姓名: {player_info['name']}")
-                print(f"国籍: {player_info['nationality']}")
-                print(f"当前战队: {player_info['current_team']}")
-                print(f"历史战队: {', '.join(player_info['history_teams'])}")
-                print(f"TI参赛次数: {player_info['ti_participations']}")
-                print(f"TI最好成绩: {player_info['ti_best_placement']}")
-                
-                # 如果历史战队为空，记录到日志文件
-                if not player_info['history_teams']:
-                    with open(log_file, "a", encoding="utf-8") as f:
-                        f.write(f"选手ID: {decoded_id}\n")
-                        f.write(f"姓名: {player_info['name']}\n")
-                        f.write(f"国籍: {player_info['nationality']}\n")
-                        f.write(f"当前战队: {player_info['current_team']}\n")
-                        f.write(f"TI参赛次数: {player_info['ti_participations']}\n")
-                        f.write(f"TI最好成绩: {player_info['ti_best_placement']}\n")
-                        f.write("-" * 50 + "\n")
-                    print(f"历史战队为空，已记录到日志文件")
-                
-                # 每处理完一个选手就保存一次JSON文件
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_players_info, f, ensure_ascii=False, indent=4)
-                print(f"已保存当前进度到 {output_file}")
-            else:
-                print(f"无法获取选手 {decoded_id} 的信息")
-                # 记录错误到日志文件
-                with open(error_log_file, "a", encoding="utf-8") as f:
-                    f.write(f"选手ID: {decoded_id}\n")
-                    f.write(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("-" * 50 + "\n")
-                print(f"错误已记录到: {error_log_file}")
-                print("程序停止")
-                sys.exit(1)
-            
-            # 添加随机延时（0.5-1秒）避免请求过快
-            delay = random.uniform(0.5, 1)
-            print(f"等待 {delay:.1f} 秒后继续...")
-            time.sleep(delay)
+        # 处理每个选手（URL解码选手ID），并发处理时按完成顺序返回
+        decoded_ids = [unquote(player_id) for player_id in player_ids]
+        if parse_workers is not None:
+            player_results = iter_player_full_info_pipeline(decoded_ids, parse_workers)
+        else:
+            player_results = iter_player_full_info(decoded_ids, concurrency)
+        for i, (decoded_id, player_info) in enumerate(player_results, 1):
+            print(f"\n完成第 {i}/{len(player_ids)} 个选手: {decoded_id}")
+            success, reason, permanent = save_player(decoded_id, player_info)
+            if not success:
+                # 上次运行留下的失败次数和退避时间不再计入
+                entry = dead_letters.add(decoded_id, reason, permanent, restart=True)
+                if permanent:
+                    print("页面或数据不存在，已放入死信队列，不自动重试，继续处理其它选手")
+                else:
+                    print(f"已放入死信队列（第 {entry['attempts']} 次失败），{retry_delay(entry['attempts'])} 秒后重试，继续处理其它选手")
+        
+        # 按退避时间重试本次处理失败的选手，不在本次选手列表中的旧记录不重试
+        recovered, remaining = retry_dead_letters(dead_letters, retry_player, player_names=decoded_ids)
         
+        writer.close()
+        crawl_journal.close()
+        compact(stream_file, output_file)
         print("\n所有选手信息处理完成！")
+        print(f"共 {writer.count} 个选手，已保存到 {output_file}")
+        if recovered:
+            print(f"重试成功 {len(recovered)} 个选手: {', '.join(recovered)}")
+        if remaining:
+            print(f"死信队列中还有 {len(remaining)} 个选手（python dead_letter.py 查看详情）:")
+            for entry in remaining:
+                print(f"  {entry['player']}: 失败 {entry['attempts']} 次，原因: {entry['reason']}")
+        print_negative_report()
+        print(f"当前请求间隔: {rate_limiter.describe_pace()}")
+        print(f"请求耗时: {http_client.describe_latency()}")
         print(f"历史战队为空的选手已记录到: {log_file}")
         if os.path.exists(error_log_file):
             print(f"处理失败的选手已记录到: {error_log_file}")
         
     except KeyboardInterrupt:
         print("\n检测到用户中断，保存当前进度...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_players_info, f, ensure_ascii=False, indent=4)
+        writer.close()
+        crawl_journal.close()
+        compact(stream_file, output_file)
         print(f"进度已保存到 {output_file}")
-        sys.exit(0) 
\ No newline at end of file
+        sys.exit(0)
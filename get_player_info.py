@@ -1,42 +1,23 @@
-import requests
-from bs4 import BeautifulSoup
 import re
 import json
 import sys
 from datetime import datetime
+import http_client
+import html_backend
+import results_table
 
 
 def get_ti_main_event_stats(results_url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    resp = requests.get(results_url, headers=headers)
-    soup = BeautifulSoup(resp.text, 'html.parser')
-
-    ti_years = []
-    ti_pattern = re.compile(r'^The International (20\d{2})\s*$')
-    for row in soup.find_all('tr'):
-        cells = row.find_all('td')
-        if len(cells) >= 5:
-            tournament = cells[4].get_text(strip=True)
-            m = ti_pattern.match(tournament)
-            if m:
-                ti_years.append(int(m.group(1)))
-    ti_participations = len(ti_years)
+    resp = http_client.get_page(results_url)
+    # 一次遍历比赛结果表格，参赛次数和最好名次都从表格记录中统计
+    rows = results_table.parse_results_table(resp.text) or []
+    ti_results = results_table.ti_rows(rows)
+    ti_participations = len(ti_results)
     ti_best_placement = ""
-    if ti_years:
-        # 找到这些年份对应的名次
-        placements = []
-        for row in soup.find_all('tr'):
-            cells = row.find_all('td')
-            if len(cells) >= 5:
-                tournament = cells[4].get_text(strip=True)
-                m = ti_pattern.match(tournament)
-                if m:
-                    place = cells[1].get_text(strip=True)
-                    match = re.search(r'(\d+)(st|nd|rd|th)?', place)
-                    if match:
-                        placements.append(int(match.group(1)))
-        if placements:
-            ti_best_placement = f"{min(placements)}th"
+    placements = [results_table.placement_number(row.placement) for year, row in ti_results]
+    placements = [place for place in placements if place != float('inf')]
+    if placements:
+        ti_best_placement = f"{min(placements)}th"
     return ti_participations, ti_best_placement
 
 
@@ -61,11 +42,11 @@ def parse_age(born_str):
 
 
 def get_player_info(url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    resp = requests.get(url, headers=headers)
-    soup = BeautifulSoup(resp.text, 'html.parser')
+    resp = http_client.get_page(url)
+    # 只解析到信息框结束，信息框以外的查找需要时再解析整页
+    page = html_backend.infobox_soup(resp.text)
 
-    infobox = soup.find('div', class_='fo-nttax-infobox-wrapper')
+    infobox = page.lookup(lambda soup: soup.find('div', class_='fo-nttax-infobox-wrapper'))
     if not infobox:
         print('No infobox found!')
         return None
@@ -150,7 +131,8 @@ def get_player_info(url):
         if 'Present' not in years_active and not re.search(r'202[3-9]', years_active):
             status = "Inactive"
     # 兼容页面顶部描述
-    if soup.find(string=re.compile('inactive', re.I)):
+    inactive_re = re.compile('inactive', re.I)
+    if page.lookup(lambda soup: soup.find(string=inactive_re), inactive_re):
         status = "Inactive"
 
     player_info = {
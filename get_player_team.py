@@ -1,25 +1,8 @@
-import requests
 import json
 from bs4 import BeautifulSoup
 import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+import http_client
 #获取战队和历史战队
-def create_session():
-    """
-    创建一个带有重试机制的session
-    """
-    session = requests.Session()
-    retry = Retry(
-        total=3,  # 最多重试3次
-        backoff_factor=2,  # 增加重试间隔时间
-        status_forcelist=[429, 500, 502, 503, 504]  # 需要重试的HTTP状态码
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
-
 def get_player_data(player_name):
     """
     获取选手的完整数据，包括当前战队和历史战队信息
@@ -28,25 +11,6 @@ def get_player_data(player_name):
     Returns:
         dict: 包含选手信息的字典
     """
-    # API配置
-    api_url = 'https://liquipedia.net/dota2/api.php'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Referer': 'https://liquipedia.net/dota2/',
-        'Origin': 'https://liquipedia.net',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'DNT': '1'
-    }
-    
-    # 创建session
-    session = create_session()
-    
     try:
         # 1. 获取展开后的模板内容
         expand_params = {
@@ -57,9 +21,7 @@ def get_player_data(player_name):
         }
         
         print("正在获取当前战队信息...")
-        response = session.get(api_url, params=expand_params, headers=headers)
-        response.raise_for_status()
-        team_data = response.json()
+        team_data = http_client.api_get(expand_params)
         
 
         # 2. 获取历史战队信息
@@ -70,9 +32,7 @@ def get_player_data(player_name):
             'prop': 'wikitext'
         }
         
-        response = session.get(api_url, params=history_params, headers=headers)
-        response.raise_for_status()
-        history_data = response.json()
+        history_data = http_client.api_get(history_params)
         
         # 3. 获取完整的HTML内容用于解析
         html_params = {
@@ -82,9 +42,7 @@ def get_player_data(player_name):
             'prop': 'text'
         }
         
-        response = session.get(api_url, params=html_params, headers=headers)
-        response.raise_for_status()
-        html_data = response.json()
+        html_data = http_client.api_get(html_params)
         
         if 'error' in html_data:
             print(f"获取HTML内容失败: {html_data['error']}")
@@ -151,8 +109,6 @@ def get_player_data(player_name):
     except Exception as e:
         print(f"Error: {str(e)}")
         return None
-    finally:
-        session.close()
 
 if __name__ == "__main__":
     # 测试选手ID
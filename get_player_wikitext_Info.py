@@ -1,9 +1,7 @@
-import requests
 import json
 from bs4 import BeautifulSoup
 import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+import http_client
 #获取的信息
 #id id里获取
 #name由givenname familyname组成
@@ -12,21 +10,6 @@ from requests.packages.urllib3.util.retry import Retry
 #status 从status里获取
 #role 从role里获取
 #擅长英雄从 hero hero2 hero3里获取
-def create_session():
-    """
-    创建一个带有重试机制的session
-    """
-    session = requests.Session()
-    retry = Retry(
-        total=3,
-        backoff_factor=2,
-        status_forcelist=[429, 500, 502, 503, 504]
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-    return session
-
 def get_player_wikitext(player_name):
     """
     获取选手页面的wikitext
@@ -35,25 +18,6 @@ def get_player_wikitext(player_name):
     Returns:
         str: 页面的wikitext内容
     """
-    # API配置
-    api_url = 'https://liquipedia.net/dota2/api.php'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Referer': 'https://liquipedia.net/dota2/',
-        'Origin': 'https://liquipedia.net',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-origin',
-        'DNT': '1'
-    }
-    
-    # 创建session
-    session = create_session()
-    
     try:
         # 获取页面wikitext
         params = {
@@ -65,9 +29,7 @@ def get_player_wikitext(player_name):
         }
         
         print(f"正在获取 {player_name} 的wikitext...")
-        response = session.get(api_url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = http_client.api_get(params)
         
         # 获取页面内容
         pages = data['query']['pages']
@@ -90,8 +52,6 @@ def get_player_wikitext(player_name):
     except Exception as e:
         print(f"Error: {str(e)}")
         return None
-    finally:
-        session.close()
 
 if __name__ == "__main__":
     # 获取Ame的wikitext
@@ -1,7 +1,6 @@
-import requests
 import json
-import re
-from bs4 import BeautifulSoup
+import http_client
+import results_table
 
 def get_ti_stats(player_name):
     """
@@ -11,12 +10,6 @@ def get_ti_stats(player_name):
     Returns:
         tuple: (ti_participations, best_placement)
     """
-    # API配置
-    api_url = 'https://liquipedia.net/dota2/api.php'
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     # 获取Results页面内容
     content_params = {
         'action': 'parse',
@@ -27,9 +20,7 @@ def get_ti_stats(player_name):
     
     try:
         # 发送API请求
-        response = requests.get(api_url, params=content_params, headers=headers)
-        response.raise_for_status()
-        content_data = response.json()
+        content_data = http_client.api_get(content_params)
         
         if 'error' in content_data:
             return 0, None
@@ -37,56 +28,15 @@ def get_ti_stats(player_name):
         # 获取页面内容
         page_content = content_data['parse']['text']['*']
         
-        # 使用BeautifulSoup解析HTML内容
-        soup = BeautifulSoup(page_content, 'html.parser')
-        
-        # 找到比赛结果表格
-        table = soup.find('table', {'class': 'wikitable'})
-        if not table:
+        # 解析比赛结果表格
+        rows = results_table.parse_results_table(page_content)
+        if rows is None:
             return 0, None
         
-        # 解析TI参赛情况
-        ti_participations = 0
-        best_placement = float('inf')
-        ti_years = set()  # 用于记录已经统计过的TI年份
-        
-        # 遍历表格行
-        for row in table.find_all('tr')[1:]:  # 跳过表头
-            cols = row.find_all('td')
-            if len(cols) < 8:  # 确保有足够的列
-                continue
-            
-            # 获取比赛名称
-            tournament_cell = cols[4]  # 第5列包含比赛名称
-            tournament_link = tournament_cell.find('a')
-            if not tournament_link:
-                continue
-                
-            tournament_text = tournament_link.text.strip()
-            
-            # 使用正则表达式匹配TI正赛
-            ti_match = re.search(r'The International (\d{4})(?!.*Qualifier)', tournament_text)
-            if ti_match:
-                year = ti_match.group(1)
-                
-                # 检查是否已经统计过这一年的TI
-                if year not in ti_years:
-                    ti_years.add(year)
-                    ti_participations += 1
-                    
-                    # 获取名次（第2列）
-                    placement_cell = cols[1]
-                    placement = placement_cell.find('b', class_='placement-text')
-                    if placement:
-                        place = placement.text.strip()
-                    else:
-                        place = placement_cell.text.strip()
-                    
-                    # 提取数字名次
-                    placement_match = re.search(r'(\d+)(?:st|nd|rd|th)?', place)
-                    if placement_match:
-                        placement_num = int(placement_match.group(1))
-                        best_placement = min(best_placement, placement_num)
+        # 统计TI参赛情况（每届只统计一次）
+        ti_results = results_table.ti_rows(rows)
+        ti_participations = len(ti_results)
+        best_placement = min((results_table.placement_number(row.placement) for year, row in ti_results), default=float('inf'))
         
         # 如果没有找到TI参赛记录，设置最好名次为None
         if best_placement == float('inf'):
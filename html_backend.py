@@ -0,0 +1,162 @@
+import re
+import sys
+import timeit
+import importlib.util
+from bs4 import BeautifulSoup
+#HTML解析后端：安装了lxml时使用lxml，只解析到需要的区域（信息框、比赛结果表格）结束为止
+
+# 解析器名称，可以改为 'html.parser' 强制使用内置解析器
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+def make_soup(html, parser=None):
+    """
+    用当前后端解析HTML
+    Args:
+        html: HTML文本
+        parser: 解析器名称，默认为HTML_PARSER
+    Returns:
+        BeautifulSoup: 解析结果
+    """
+    return BeautifulSoup(html, parser or HTML_PARSER)
+
+def region_html(html, tag, class_name):
+    """
+    截取页面开头到第一个带有class_name的tag元素结束的部分
+    按开始、结束标签计算嵌套层数，不构建DOM树
+    Args:
+        html: 整页HTML
+        tag: 标签名，如 'div'、'table'
+        class_name: 元素class中的一项
+    Returns:
+        str: 截取的HTML，找不到元素或元素没有闭合时返回None
+    """
+    start_re = re.compile(r'<%s\b[^>]*\bclass="(?:[^"]*\s)?%s(?:\s[^"]*)?"' % (tag, re.escape(class_name)))
+    start = start_re.search(html)
+    if not start:
+        return None
+    depth = 0
+    for match in re.finditer(r'<(/?)%s\b' % tag, html[start.start():]):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            end = html.find('>', start.start() + match.end())
+            return html[:end + 1] if end != -1 else None
+    return None
+
+def region_soup(html, tag, class_name):
+    """
+    只解析到第一个目标元素结束，找不到目标元素时解析整页
+    Args:
+        html: 整页HTML
+        tag: 标签名
+        class_name: 元素class中的一项
+    Returns:
+        BeautifulSoup: 解析结果，第一个目标元素与解析整页时相同
+    """
+    return make_soup(region_html(html, tag, class_name) or html)
+
+class RegionSoup:
+    """
+    先只解析页面开头到目标区域结束的部分，区域中查找不到时再解析整页
+    区域是整页的前缀，在区域中按文档顺序找到的第一个结果与在整页中查找的结果相同
+    """
+    def __init__(self, html, tag, class_name):
+        self.html = html
+        self.region_html = region_html(html, tag, class_name)
+        self._region = None
+        self._full = None
+
+    @property
+    def full(self):
+        """整页的解析结果"""
+        if self._full is None:
+            self._full = make_soup(self.html)
+        return self._full
+
+    @property
+    def region(self):
+        """区域的解析结果，找不到区域时为整页"""
+        if self.region_html is None or self._full is not None:
+            return self.full
+        if self._region is None:
+            self._region = make_soup(self.region_html)
+        return self._region
+
+    def lookup(self, find, marker=None):
+        """
+        在区域中查找，没有结果时在整页中重新查找
+        Args:
+            find: 查找函数 find(soup)，没有找到时返回None
+            marker: 要找的元素在HTML原文中必然匹配的正则，原文中没有匹配时不再解析整页
+        Returns:
+            查找结果
+        """
+        region = self.region
+        result = find(region)
+        if result is None and region is not self._full and (marker is None or marker.search(self.html)):
+            result = find(self.full)
+        return result
+
+def infobox_soup(html):
+    """选手页面的信息框区域"""
+    return RegionSoup(html, 'div', 'fo-nttax-infobox-wrapper')
+
+# 查找函数对应的原文标记，用于RegionSoup.lookup
+TEAM_MARKER = re.compile(r'Team:')
+HISTORY_MARKER = re.compile(r'<div\b[^>]*>History</div>')
+
+def find_team_link(soup):
+    """信息框中 Team: 之后的战队链接"""
+    team_text = soup.find(string=lambda text: text and 'Team:' in text)
+    return team_text.find_next('a') if team_text else None
+
+def find_history_table(soup):
+    """信息框中History下的历史战队表格"""
+    history_div = soup.find('div', string='History')
+    table_div = history_div.find_next('div', class_='infobox-center') if history_div else None
+    return table_div.find('table') if table_div else None
+
+def _extract_with_full_parse(html, parser):
+    soup = BeautifulSoup(html, parser)
+    team_link = find_team_link(soup)
+    history_table = find_history_table(soup)
+    table = soup.find('table', {'class': 'wikitable'})
+    return (team_link.get_text(strip=True) if team_link else None,
+            [a.get_text(strip=True) for a in history_table.find_all('a')] if history_table else None,
+            [[td.get_text(strip=True) for td in tr.find_all('td')] for tr in table.find_all('tr')] if table else None)
+
+def _extract_with_regions(html):
+    page = infobox_soup(html)
+    team_link = page.lookup(find_team_link, TEAM_MARKER)
+    history_table = page.lookup(find_history_table, HISTORY_MARKER)
+    table = region_soup(html, 'table', 'wikitable').find('table', {'class': 'wikitable'})
+    return (team_link.get_text(strip=True) if team_link else None,
+            [a.get_text(strip=True) for a in history_table.find_all('a')] if history_table else None,
+            [[td.get_text(strip=True) for td in tr.find_all('td')] for tr in table.find_all('tr')] if table else None)
+
+def benchmark(file, number=20):
+    """
+    对比整页html.parser解析和按区域解析提取信息框、比赛表格的耗时，并检查结果是否一致
+    Args:
+        file: 页面HTML文件
+        number: 重复次数
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        html = f.read()
+    expected = _extract_with_full_parse(html, 'html.parser')
+    print(f"{file}（{len(html)} 字符），当前后端: {HTML_PARSER}")
+    print(f"  当前战队: {expected[0]}，历史战队 {len(expected[1] or [])} 个，比赛表格 {len(expected[2] or [])} 行")
+    cases = [
+        ('整页 html.parser', lambda: _extract_with_full_parse(html, 'html.parser')),
+        (f'整页 {HTML_PARSER}', lambda: _extract_with_full_parse(html, HTML_PARSER)),
+        (f'按区域 {HTML_PARSER}', lambda: _extract_with_regions(html)),
+    ]
+    base_time = None
+    for label, func in cases:
+        same = func() == expected
+        elapsed = timeit.timeit(func, number=number) / number
+        base_time = base_time or elapsed
+        print(f"  {label:<20}{elapsed * 1000:8.2f} 毫秒/次（{base_time / elapsed:.1f} 倍）结果{'一致' if same else '不一致'}")
+
+if __name__ == "__main__":
+    # 用法: python html_backend.py [页面HTML文件]
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else 'player_page.html')
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from rate_limiter import rate_limiter, parse_retry_after, MAX_THROTTLE_RETRIES
+#所有脚本共用的HTTP客户端：连接池复用keep-alive连接，统一请求头、压缩、超时和重试策略，统一限速并统计每个请求的耗时
+
+API_URL = 'https://liquipedia.net/dota2/api.php'
+BASE_URL = 'https://liquipedia.net/dota2/'
+HEADERS = {
+    'User-Agent': 'Dota2PlayerInfoBot/1.0 (https://github.com/844192221/Dota2Parse; starzhangxing@live.com)',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'Accept-Language': 'en-US,en;q=0.9',
+    # 只声明requests能解压的编码（安装了brotli时包含br），Liquipedia要求使用压缩
+    'Accept-Encoding': requests.utils.DEFAULT_ACCEPT_ENCODING,
+    'Referer': BASE_URL
+}
+# 直接访问页面时请求HTML
+PAGE_HEADERS = {'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8'}
+# 连接池中保留的连接数，不少于同时发送请求的线程数
+POOL_SIZE = 8
+# 连接失败和5xx的重试（429由限速器处理）
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 5
+RETRY_STATUS = [500, 502, 503, 504]
+# (连接超时, 读取超时)，秒
+TIMEOUT = (10, 60)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+# action -> [请求数, 总耗时, 最长耗时]
+_latency = {}
+_latency_lock = threading.Lock()
+
+def create_session():
+    """
+    创建一个带有连接池、统一请求头和重试机制的session
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        # 不让urllib3按Retry-After自动重试429，由限速器统一处理
+        respect_retry_after_header=False
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session():
+    """
+    本进程共用的session，第一次调用时创建，之后的请求复用已建立的连接
+    子进程中会重新创建，不与父进程共用连接
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
+
+def close_session():
+    """关闭本进程共用的session"""
+    global _session
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+
+def _record_latency(action, elapsed):
+    with _latency_lock:
+        stats = _latency.setdefault(action, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+def get(url, action, session=None, **kwargs):
+    """
+    按action限速发送GET请求，遇到429时按Retry-After暂停并放慢该action后重试，记录每次请求的耗时
+    Args:
+        url: 请求地址
+        action: 限速使用的action（API请求为query/parse/expandtemplates，直接访问页面用page）
+        session: 使用的session，默认为本进程共用的session
+        **kwargs: 传给session.get的参数，默认超时为TIMEOUT
+    Returns:
+        requests.Response: 响应，连续MAX_THROTTLE_RETRIES次重试后仍为429时返回最后一次的响应
+    """
+    session = session or get_session()
+    kwargs.setdefault('timeout', TIMEOUT)
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        rate_limiter.acquire(action)
+        start = time.perf_counter()
+        response = session.get(url, **kwargs)
+        _record_latency(action, time.perf_counter() - start)
+        if response.status_code != 429:
+            rate_limiter.succeeded(action)
+            return response
+        if attempt < MAX_THROTTLE_RETRIES:
+            rate_limiter.throttled(action, parse_retry_after(response.headers.get('Retry-After')))
+    return response
+
+def api_get(params, session=None):
+    """
+    发送API请求
+    Args:
+        params: API请求参数
+        session: 使用的session，默认为本进程共用的session
+    Returns:
+        dict: API返回的JSON数据
+    """
+    response = get(API_URL, params['action'], session=session, params=params)
+    response.raise_for_status()
+    return response.json()
+
+def get_page(url, session=None):
+    """
+    直接获取Liquipedia页面（非API），按page限速
+    Args:
+        url: 页面地址，或BASE_URL之后的页面路径，如 "Yatoro/Results"
+        session: 使用的session，默认为本进程共用的session
+    Returns:
+        requests.Response: 响应
+    """
+    if not url.startswith('http'):
+        url = BASE_URL + url
+    return get(url, 'page', session=session, headers=PAGE_HEADERS)
+
+def latency_stats():
+    """
+    本进程的请求耗时统计（不含限速等待）
+    Returns:
+        dict: action -> {'count': 请求数, 'avg': 平均耗时, 'max': 最长耗时}，单位秒
+    """
+    with _latency_lock:
+        return {action: {'count': count, 'avg': total / count, 'max': longest}
+                for action, (count, total, longest) in _latency.items()}
+
+def describe_latency():
+    """请求耗时统计的文字说明"""
+    stats = latency_stats()
+    if not stats:
+        return '没有发送请求'
+    return '，'.join(f"{action} {s['count']} 次 平均 {s['avg']:.2f}秒 最长 {s['max']:.2f}秒"
+                    for action, s in stats.items())
@@ -0,0 +1,127 @@
+import re
+import sys
+import timeit
+#一次扫描解析wikitext中的模板参数（主要用于 {{Infobox player ...}}）
+
+INFOBOX_NAME = 'Infobox player'
+
+# 模板中需要关心的标记：嵌套模板、链接、参数分隔符和注释
+_TOKEN_RE = re.compile(r'\{\{|\}\}|\[\[|\]\]|\||<!--.*?(?:-->|$)', re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?(?:-->|$)', re.DOTALL)
+
+def _template_start_re(name):
+    # 模板名首字母不区分大小写，空格和下划线等价
+    first, rest = name[0], re.escape(name[1:]).replace(r'\ ', '[ _]')
+    return re.compile(r'\{\{\s*[%s%s]%s\s*(?=\||\}\})' % (first.upper(), first.lower(), rest))
+
+_INFOBOX_START_RE = _template_start_re(INFOBOX_NAME)
+
+def parse_template(wikitext, name=INFOBOX_NAME):
+    """
+    一次扫描取出模板的全部参数，扫描到模板结束即停止，不处理页面其余部分
+    嵌套模板和链接中的 | 和 = 不会被当作分隔符，HTML注释会被去掉
+    Args:
+        wikitext: 页面wikitext
+        name: 模板名
+    Returns:
+        dict: 参数名 -> 参数值（已去掉首尾空白），位置参数的键为 '1'、'2'...；没有找到模板时返回空字典
+    """
+    start_re = _INFOBOX_START_RE if name == INFOBOX_NAME else _template_start_re(name)
+    start = start_re.search(wikitext)
+    if not start:
+        return {}
+
+    params = {}
+    position = 1
+    depth = 0
+    # 当前参数的起始位置，模板名之后第一个 | 之前的内容不是参数
+    field_start = None
+    for token in _TOKEN_RE.finditer(wikitext, start.end()):
+        text = token.group()
+        if text == '|':
+            if depth:
+                continue
+        elif text == '{{' or text == '[[':
+            depth += 1
+            continue
+        elif text == '}}':
+            if depth:
+                depth -= 1
+                continue
+        elif text == ']]':
+            if depth:
+                depth -= 1
+            continue
+        else:
+            # 注释中的 | 等标记不处理，参数结束时整体去掉注释
+            continue
+        
+        # 顶层的 | 或模板结束的 }}
+        if field_start is not None:
+            field = wikitext[field_start:token.start()]
+            if '<!--' in field:
+                field = _COMMENT_RE.sub('', field)
+            key, sep, value = field.partition('=')
+            # 等号出现在嵌套模板或链接里时不是参数名
+            if sep and '{{' not in key and '[[' not in key:
+                params[key.strip()] = value.strip()
+            else:
+                params[str(position)] = field.strip()
+                position += 1
+        if text == '}}':
+            break
+        field_start = token.end()
+    return params
+
+def parse_infobox(wikitext):
+    """
+    解析选手页面的 {{Infobox player}} 模板
+    Args:
+        wikitext: 选手页面wikitext
+    Returns:
+        dict: 参数名 -> 参数值
+    """
+    return parse_template(wikitext, INFOBOX_NAME)
+
+def _regex_fields(wikitext):
+    """原来逐个字段用正则搜索整页的做法，只用于对比性能"""
+    fields = {}
+    for key in ['name', 'country', 'birth', 'birthdate', 'birth_date', 'born',
+                'role', 'role2', 'role3', 'hero', 'hero2', 'hero3', 'status']:
+        match = re.search(r'\|\s*%s\s*=\s*(.*?)(?:\n|\|)' % key, wikitext)
+        if match:
+            fields[key] = match.group(1).strip()
+    history = re.search(r'\|\s*history\s*=(.*?)(?:\n\||$)', wikitext, re.DOTALL)
+    if history:
+        fields['history'] = history.group(1)
+    dota2 = re.search(r"'''Dota 2''':(.*?)(?='''|$)", wikitext, re.DOTALL)
+    if dota2:
+        fields['dota2'] = dota2.group(1)
+    return fields
+
+def benchmark(files, number=2000):
+    """
+    对比逐字段正则搜索和一次扫描解析的耗时
+    Args:
+        files: wikitext文件列表
+        number: 每种方法的重复次数
+    """
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            wikitext = f.read()
+        regex_time = timeit.timeit(lambda: _regex_fields(wikitext), number=number) / number
+        parse_time = timeit.timeit(lambda: parse_infobox(wikitext), number=number) / number
+        print(f"{file}（{len(wikitext)} 字符）")
+        print(f"  正则逐字段搜索: {regex_time * 1e6:8.1f} 微秒/次")
+        print(f"  一次扫描解析:   {parse_time * 1e6:8.1f} 微秒/次（{regex_time / parse_time:.1f} 倍）")
+
+if __name__ == "__main__":
+    # 用法: python infobox_parser.py [wikitext文件...]，打印解析结果并对比性能
+    files = sys.argv[1:] or ['emo_wikitext.txt', 'flyby_wikitext.txt']
+    for file in files:
+        with open(file, 'r', encoding='utf-8') as f:
+            params = parse_infobox(f.read())
+        print(f"{file}: {len(params)} 个参数")
+        for key, value in params.items():
+            print(f"  {key} = {value!r}")
+    benchmark(files)
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+#逐行追加写入JSON记录（JSON Lines），每处理完一条只写这一条，结束时再整理为缩进格式的JSON文件
+
+# 默认每写入这么多条或经过这么多秒同步一次磁盘
+FSYNC_EVERY = 20
+FSYNC_INTERVAL = 5.0
+
+def _truncate_partial_line(path):
+    """去掉文件末尾写了一半的行，避免追加的记录接在后面"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        # 从末尾向前找到最后一个换行符
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            index = chunk.rfind(b'\n')
+            if index != -1:
+                position = position - step + index + 1
+                break
+            position -= step
+        if position != size:
+            f.truncate(position)
+
+class JsonlWriter:
+    """
+    追加写入JSONL文件，每条记录一行
+    每条记录写入后立即flush到操作系统，进程崩溃不会丢失；按条数或时间间隔fsync，断电时最多丢失最近的几条
+    """
+    def __init__(self, path, append=True, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        """
+        Args:
+            path: 输出文件
+            append: 是否在已有文件后追加，False时清空文件
+            fsync_every: 每写入多少条同步一次磁盘
+            fsync_interval: 距上次同步超过多少秒时同步
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if append:
+            _truncate_partial_line(path)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record):
+        """写入一条记录"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """把已写入的记录同步到磁盘"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def read_jsonl(path):
+    """
+    逐条读取JSONL文件，跳过写了一半的最后一行（写入时进程被强制结束）
+    Args:
+        path: JSONL文件
+    Yields:
+        dict: 每条记录
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            if line.strip():
+                yield json.loads(line)
+
+def compact(jsonl_path, json_path, indent=4):
+    """
+    把JSONL文件整理为与 json.dump(records, f, ensure_ascii=False, indent=indent) 相同格式的JSON文件
+    逐条转换写出，不需要把全部记录读入内存；先写临时文件再替换，中途失败不会破坏原有的JSON文件
+    Args:
+        jsonl_path: JSONL文件
+        json_path: 输出的JSON文件
+        indent: 缩进空格数
+    Returns:
+        int: 记录数量
+    """
+    prefix = ' ' * indent
+    count = 0
+    temp_path = json_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in read_jsonl(jsonl_path):
+            text = json.dumps(record, ensure_ascii=False, indent=indent)
+            f.write(',\n' if count else '\n')
+            f.write('\n'.join(prefix + line for line in text.split('\n')))
+            count += 1
+        f.write('\n]' if count else ']')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, json_path)
+    return count
+
+if __name__ == "__main__":
+    # 用法: python jsonl_writer.py 输入.jsonl [输出.json]，把JSONL文件整理为JSON文件
+    jsonl_path = sys.argv[1]
+    json_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(jsonl_path)[0] + '.json'
+    count = compact(jsonl_path, json_path)
+    print(f"已将 {count} 条记录写入 {json_path}")
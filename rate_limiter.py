@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Liquipedia API限制：parse请求每30秒1个，其它请求每2秒1个
+# 直接访问页面（非API）按每秒1个控制
+DEFAULT_INTERVALS = {
+    'query': 2,
+    'parse': 30,
+    'expandtemplates': 2,
+    'page': 1
+}
+# 遇到429时请求间隔乘以BACKOFF_FACTOR（不超过MAX_INTERVAL）；之后每次请求成功，
+# 请求速率增加基础速率的RECOVERY_STEP，直到恢复为基础间隔（AIMD）
+BACKOFF_FACTOR = 2
+RECOVERY_STEP = 0.1
+MAX_INTERVAL = 600
+# 同一个请求连续遇到429的最多重试次数（http_client.get）
+MAX_THROTTLE_RETRIES = 6
+# 同一台机器上所有脚本共用的限速状态文件，同时运行的脚本合计不超过API限制
+RATE_LIMIT_FILE = os.path.join(tempfile.gettempdir(), 'liquipedia_rate_limit.json')
+
+def parse_retry_after(value):
+    """
+    解析Retry-After响应头
+    Args:
+        value: 秒数或HTTP日期
+    Returns:
+        float: 需要等待的秒数，没有或无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    令牌桶，每interval秒补充一个令牌，最多积累capacity个
+    遇到请求限制时可以暂停到指定时间，暂停结束后立即放行一个请求
+    """
+    def __init__(self, interval, capacity=1):
+        self.interval = interval
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed / self.interval)
+        self.updated_at = max(self.updated_at, now)
+
+    def acquire(self):
+        """
+        获取一个令牌，令牌不足或处于暂停中时等待
+        Returns:
+            float: 实际等待的秒数
+        """
+        with self.lock:
+            wait_time = 0
+            now = time.monotonic()
+            if now < self.blocked_until:
+                wait_time += self.blocked_until - now
+                time.sleep(self.blocked_until - now)
+                now = time.monotonic()
+            self._refill(now)
+            if self.tokens < 1:
+                wait = (1 - self.tokens) * self.interval
+                wait_time += wait
+                time.sleep(wait)
+                self._refill(time.monotonic())
+            self.tokens -= 1
+            return wait_time
+
+    def block(self, seconds):
+        """从现在起暂停seconds秒"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 1
+            self.updated_at = self.blocked_until
+
+    def adjust(self, func):
+        """
+        修改请求间隔
+        Args:
+            func: func(当前间隔) 返回新的间隔
+        Returns:
+            float: 新的间隔
+        """
+        with self.lock:
+            self.interval = func(self.interval)
+            return self.interval
+
+class FileLock:
+    """跨进程的文件锁（Linux/macOS使用fcntl，Windows使用msvcrt）"""
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            while True:
+                # LK_LOCK重试10次（约10秒）仍未获得锁时抛出OSError，继续等待
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+
+def _read_state(state_file):
+    """读取共用的限速状态，文件不存在或损坏时返回空状态"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class SharedBucket:
+    """
+    同一台机器上多个进程共用的限速桶，状态 {action: {'interval', 'next', 'updated_at'}} 保存在文件中，加文件锁读写
+    每次请求预约下一个可用的时间点后在锁外等待，多个脚本同时运行时合计速率不超过限制；
+    遇到429时的暂停和放慢也对所有进程生效
+    """
+    def __init__(self, state_file, action, interval):
+        """
+        Args:
+            state_file: 状态文件
+            action: 限速的action
+            interval: 基础请求间隔（秒）
+        """
+        self.state_file = state_file
+        self.lock_file = state_file + '.lock'
+        self.action = action
+        self.base_interval = interval
+
+    def _update(self, func):
+        """
+        在文件锁内读取本action的状态，调用 func(状态, 当前时间) 修改后写回
+        Returns:
+            func的返回值
+        """
+        with FileLock(self.lock_file):
+            state = _read_state(self.state_file)
+            now = time.time()
+            entry = state.get(self.action)
+            # 很久没有使用的状态（之前运行的脚本留下的）恢复为基础间隔
+            if entry is None or (now - entry['updated_at'] > MAX_INTERVAL and entry['next'] <= now):
+                entry = {'interval': self.base_interval, 'next': 0}
+            result = func(entry, now)
+            entry['updated_at'] = now
+            state[self.action] = entry
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            return result
+
+    @property
+    def interval(self):
+        return self._update(lambda entry, now: entry['interval'])
+
+    def acquire(self):
+        """
+        预约下一个可用的时间点并等待到该时间
+        Returns:
+            float: 实际等待的秒数
+        """
+        def reserve(entry, now):
+            slot = max(now, entry['next'])
+            entry['next'] = slot + entry['interval']
+            return slot - now
+        wait_time = self._update(reserve)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def block(self, seconds):
+        """从现在起所有进程暂停seconds秒"""
+        def block(entry, now):
+            entry['next'] = max(entry['next'], now + seconds)
+        self._update(block)
+
+    def adjust(self, func):
+        """修改所有进程共用的请求间隔，返回新的间隔"""
+        def apply(entry, now):
+            entry['interval'] = func(entry['interval'])
+            return entry['interval']
+        return self._update(apply)
+
+class RateLimiter:
+    """
+    按API action分桶的限速器，只有额度用完时才会等待
+    遇到429时按Retry-After暂停对应的action并成倍放慢请求，之后请求成功时逐步恢复到基础速率
+    """
+    def __init__(self, intervals=None, state_file=None):
+        """
+        Args:
+            intervals: action -> 基础请求间隔（秒）
+            state_file: 多个进程共用的状态文件，为None时只在本进程内限速
+        """
+        intervals = intervals or DEFAULT_INTERVALS
+        self.base_intervals = dict(intervals)
+        if state_file:
+            self.buckets = {action: SharedBucket(state_file, action, interval) for action, interval in intervals.items()}
+        else:
+            self.buckets = {action: TokenBucket(interval) for action, interval in intervals.items()}
+
+    def _bucket_name(self, action):
+        return action if action in self.buckets else 'query'
+
+    def acquire(self, action):
+        """
+        发送请求前调用，获取对应action的额度
+        Args:
+            action: API action名称（query/parse/expandtemplates），直接访问页面用page
+        Returns:
+            float: 实际等待的秒数
+        """
+        bucket = self.buckets[self._bucket_name(action)]
+        wait_time = bucket.acquire()
+        if wait_time >= 1:
+            print(f"[{action}] 等待 {wait_time:.1f} 秒以遵守API限制")
+        return wait_time
+
+    def throttled(self, action, retry_after=None):
+        """
+        请求返回429时调用：请求间隔乘以BACKOFF_FACTOR，并暂停该action
+        Args:
+            action: API action名称
+            retry_after: Retry-After给出的等待秒数，没有时等待调整后的请求间隔
+        Returns:
+            float: 暂停的秒数
+        """
+        name = self._bucket_name(action)
+        bucket = self.buckets[name]
+        interval = bucket.adjust(lambda interval: min(MAX_INTERVAL, interval * BACKOFF_FACTOR))
+        wait_time = interval if retry_after is None else retry_after
+        bucket.block(wait_time)
+        print(f"[{name}] 遇到请求限制，暂停 {wait_time:.0f} 秒，请求间隔调整为 {interval:.1f} 秒")
+        return wait_time
+
+    def succeeded(self, action):
+        """请求没有被限制时调用：请求速率增加基础速率的RECOVERY_STEP，不超过基础速率"""
+        name = self._bucket_name(action)
+        base_interval = self.base_intervals[name]
+        self.buckets[name].adjust(lambda interval: max(base_interval, 1 / (1 / interval + RECOVERY_STEP / base_interval)))
+
+    def pace(self):
+        """
+        当前各action的请求间隔
+        Returns:
+            dict: action -> 当前间隔（秒），大于基础间隔表示仍在从429中恢复
+        """
+        return {name: bucket.interval for name, bucket in self.buckets.items()}
+
+    def describe_pace(self):
+        """当前请求间隔的文字说明"""
+        return '，'.join(
+            f"{name} {interval:.1f}秒" + (f"（基础 {self.base_intervals[name]}秒）" if interval > self.base_intervals[name] else '')
+            for name, interval in self.pace().items()
+        )
+
+# 所有模块共用的限速器，同一台机器上运行的所有脚本通过状态文件共享API额度
+rate_limiter = RateLimiter(state_file=RATE_LIMIT_FILE)
+
+if __name__ == "__main__":
+    # 用法: python rate_limiter.py [reset]，查看或重置同一台机器上所有脚本共用的请求间隔
+    if len(sys.argv) > 1 and sys.argv[1] == 'reset':
+        if os.path.exists(RATE_LIMIT_FILE):
+            os.remove(RATE_LIMIT_FILE)
+        print(f"已重置 {RATE_LIMIT_FILE}")
+    else:
+        print(f"{RATE_LIMIT_FILE}: {rate_limiter.describe_pace()}")
@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import pandas as pd
+import results_table
+from cache_store import open_cache
+#所有选手的比赛结果（Results页面表格的每一行）组成的列式数据集，奖金、名次等转为数值，统计时按列批量计算
+
+DATASET_FILE = os.path.join("cache", "results_dataset.pkl")
+# get_player_full_info.py 保存的Results页面缓存，直接打开，不导入整个爬虫
+RESULTS_CACHE_FILE = os.path.join("cache", "results_cache.db")
+results_cache = open_cache(RESULTS_CACHE_FILE)
+# 数据集的列，原始文字列之外的数值列在建立数据集时一次性转换
+COLUMNS = ['player'] + list(results_table.ResultRow._fields)
+
+def _page_fingerprint(page_content):
+    """Results页面内容的指纹，页面没有变化时不重新解析"""
+    return hashlib.sha1(page_content.encode('utf-8')).hexdigest()
+
+def _normalize(frame):
+    """
+    把文字列转为数值列：奖金转为整数美元，名次取区间的最好名次，日期转为日期和年份，并标记TI正赛
+    Args:
+        frame: 只有原始文字列的DataFrame
+    Returns:
+        DataFrame: 增加了 prize_usd、rank、date_value、year、ti_year 列
+    """
+    frame['player'] = frame['player'].astype('category')
+    frame['tier'] = frame['tier'].astype('category')
+    frame['highlighted'] = frame['highlighted'].astype(bool)
+    # "$1,234" -> 1234，没有奖金时为0
+    prize = frame['prize'].str.extract(r'([\d,]+)', expand=False).str.replace(',', '', regex=False)
+    frame['prize_usd'] = pd.to_numeric(prize, errors='coerce').fillna(0).astype('int64')
+    # "5th - 6th" -> 5，没有数字的名次（如DQ）为NaN
+    frame['rank'] = pd.to_numeric(frame['placement'].str.extract(r'(\d+)', expand=False), errors='coerce')
+    frame['date_value'] = pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce')
+    frame['year'] = frame['date_value'].dt.year.astype('Int64')
+    # TI正赛的年份，与results_table.ti_year的规则一致
+    ti_year = frame['tournament'].str.extract(r'The International (\d{4})', expand=False)
+    frame['ti_year'] = ti_year.where(~frame['tournament'].str.contains('Qualifier', regex=False))
+    return frame
+
+def _player_frame(player_name, rows):
+    """一个选手的比赛结果行转为只有原始文字列的DataFrame"""
+    frame = pd.DataFrame.from_records(rows, columns=results_table.ResultRow._fields)
+    frame.insert(0, 'player', player_name)
+    return frame
+
+def load_dataset(dataset_file=DATASET_FILE):
+    """
+    读取保存的数据集
+    Returns:
+        tuple: (DataFrame, 选手ID -> 页面指纹)，没有保存过时DataFrame为None
+    """
+    if not os.path.exists(dataset_file):
+        return None, {}
+    with open(dataset_file, 'rb') as f:
+        data = pickle.load(f)
+    return data['frame'], data['fingerprints']
+
+def save_dataset(frame, fingerprints, dataset_file=DATASET_FILE):
+    """保存数据集和每个选手的页面指纹"""
+    os.makedirs(os.path.dirname(dataset_file), exist_ok=True)
+    with open(dataset_file, 'wb') as f:
+        pickle.dump({'frame': frame, 'fingerprints': fingerprints}, f)
+
+def build_dataset(player_names=None, dataset_file=DATASET_FILE):
+    """
+    从缓存的Results页面建立或更新数据集，只解析新增或内容变化的页面
+    已过期的Results页面也照常使用（离线建立数据集不重新获取），缓存中已经没有Results页面的选手保留原有数据
+    Args:
+        player_names: 选手ID列表，默认为Results缓存中的全部选手
+        dataset_file: 数据集文件
+    Returns:
+        DataFrame: 每行一条比赛结果
+    """
+    frame, fingerprints = load_dataset(dataset_file)
+    if player_names is None:
+        player_names = results_cache.keys(include_expired=True)
+
+    changed = {}
+    for player_name in player_names:
+        page_content = results_cache.get(player_name, include_expired=True)
+        if page_content is None:
+            continue
+        fingerprint = _page_fingerprint(page_content)
+        if fingerprints.get(player_name) == fingerprint:
+            continue
+        rows = results_table.parse_results_table(page_content) or []
+        changed[player_name] = (fingerprint, rows)
+
+    if not changed:
+        if frame is not None:
+            print(f"数据集没有变化，共 {len(fingerprints)} 个选手 {len(frame)} 条比赛结果")
+        return frame
+
+    print(f"解析了 {len(changed)} 个选手的Results页面")
+    frames = [_player_frame(player_name, rows) for player_name, (fingerprint, rows) in changed.items()]
+    if frame is not None:
+        # 去掉需要更新的选手的旧数据，只保留原始文字列重新合并
+        kept = frame[~frame['player'].isin(list(changed))]
+        frames.insert(0, kept[COLUMNS].astype({'player': str, 'tier': str}))
+    frame = _normalize(pd.concat(frames, ignore_index=True))
+    for player_name, (fingerprint, rows) in changed.items():
+        fingerprints[player_name] = fingerprint
+
+    save_dataset(frame, fingerprints, dataset_file)
+    print(f"数据集已更新，共 {len(fingerprints)} 个选手 {len(frame)} 条比赛结果")
+    return frame
+
+def earnings_by_year(frame):
+    """
+    每个选手每年的奖金
+    Returns:
+        DataFrame: 行为选手，列为年份，值为奖金（美元）
+    """
+    return frame.groupby(['player', 'year'], observed=True)['prize_usd'].sum().unstack(fill_value=0)
+
+def player_summary(frame):
+    """
+    按选手统计比赛次数、总奖金、冠军和前三次数、最好名次、TI参赛次数和活跃年份
+    Returns:
+        DataFrame: 每个选手一行，按总奖金从高到低排序
+    """
+    grouped = frame.assign(
+        win=frame['rank'].eq(1),
+        top3=frame['rank'].le(3)
+    ).groupby('player', observed=True)
+    summary = grouped.agg(
+        tournaments=('tournament', 'size'),
+        earnings=('prize_usd', 'sum'),
+        wins=('win', 'sum'),
+        top3=('top3', 'sum'),
+        best_rank=('rank', 'min'),
+        ti_participations=('ti_year', 'nunique'),
+        first_year=('year', 'min'),
+        last_year=('year', 'max')
+    )
+    return summary.sort_values('earnings', ascending=False)
+
+def placements_by_tier(frame):
+    """
+    每个级别的比赛中各名次出现的次数
+    Returns:
+        DataFrame: 行为级别，列为名次
+    """
+    return frame.dropna(subset=['rank']).pivot_table(
+        index='tier', columns='rank', values='tournament', aggfunc='size', fill_value=0, observed=True)
+
+if __name__ == "__main__":
+    # 用法: python results_dataset.py [选手ID...]，建立或更新数据集并输出统计结果
+    frame = build_dataset(sys.argv[1:] or None)
+    if frame is None or frame.empty:
+        print("没有可用的比赛结果，请先运行 get_player_full_info.py 获取Results页面")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    summary = player_summary(frame)
+    earnings = earnings_by_year(frame)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(frame)} 条比赛结果，统计耗时 {elapsed * 1000:.1f} 毫秒")
+
+    pd.set_option('display.width', 200)
+    print("\n总奖金最高的选手:")
+    print(summary.head(20).to_string())
+    print("\n每年奖金:")
+    print(earnings.loc[summary.index[:20]].to_string())
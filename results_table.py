@@ -0,0 +1,175 @@
+import re
+import sys
+import json
+from typing import NamedTuple
+import html_backend
+#解析选手Results页面的比赛结果表格：一次遍历表格得到每一行的记录，TI参赛次数、最好名次等都从记录中统计
+
+# 比赛结果表格各列的位置，列数不足的行（如年份分隔行）不是比赛记录
+DATE_COLUMN = 0
+PLACEMENT_COLUMN = 1
+TIER_COLUMN = 2
+TOURNAMENT_COLUMN = 4
+TEAM_COLUMN = 5
+PRIZE_COLUMN = 7
+MIN_COLUMNS = 8
+
+_TI_RE = re.compile(r'The International (\d{4})')
+_PLACEMENT_RE = re.compile(r'(\d+)(?:st|nd|rd|th)?')
+
+class ResultRow(NamedTuple):
+    """比赛结果表格中的一行"""
+    date: str
+    placement: str
+    tier: str
+    tournament: str
+    team: str
+    prize: str
+    highlighted: bool
+
+def parse_results_table(page_content):
+    """
+    解析Results页面的比赛结果表格，只解析到第一个表格结束，每行只访问一次
+    Args:
+        page_content: Results页面HTML
+    Returns:
+        list: 按表格顺序排列的ResultRow，未找到比赛结果表格时返回None
+    """
+    soup = html_backend.region_soup(page_content, 'table', 'wikitable')
+    table = soup.find('table', {'class': 'wikitable'})
+    if not table:
+        return None
+
+    rows = []
+    for row in table.find_all('tr')[1:]:  # 跳过表头
+        cols = row.find_all('td')
+        if len(cols) < MIN_COLUMNS:
+            continue
+
+        # 比赛名称取比赛列中的链接文字
+        tournament_cell = cols[TOURNAMENT_COLUMN]
+        tournament_link = tournament_cell.find('a')
+        tournament = (tournament_link or tournament_cell).text.strip()
+
+        # 名次优先取加粗的名次文字
+        placement_cell = cols[PLACEMENT_COLUMN]
+        placement = placement_cell.find('b', class_='placement-text') or placement_cell
+
+        rows.append(ResultRow(
+            date=cols[DATE_COLUMN].text.strip(),
+            placement=placement.text.strip(),
+            tier=cols[TIER_COLUMN].text.strip(),
+            tournament=tournament,
+            team=cols[TEAM_COLUMN].text.strip(),
+            prize=cols[PRIZE_COLUMN].text.strip(),
+            # TI等重要比赛的行有特殊背景
+            highlighted='tournament-highlighted-bg' in row.get('class', [])
+        ))
+    return rows
+
+def ti_year(tournament):
+    """
+    判断比赛是否为TI正赛
+    Args:
+        tournament: 比赛名称
+    Returns:
+        str: TI年份，不是TI正赛（包括预选赛）时返回None
+    """
+    if 'Qualifier' in tournament:
+        return None
+    match = _TI_RE.search(tournament)
+    return match.group(1) if match else None
+
+def placement_number(place):
+    """名次中的数字，如 '5th - 6th' 为5，没有数字时为无穷大"""
+    match = _PLACEMENT_RE.search(place)
+    if match:
+        return int(match.group(1))
+    return float('inf')
+
+def ti_rows(rows):
+    """
+    每届TI只取表格中的第一行
+    Args:
+        rows: parse_results_table返回的记录
+    Returns:
+        list: (年份, ResultRow)，按表格顺序
+    """
+    seen = {}
+    for row in rows:
+        year = ti_year(row.tournament)
+        if year and year not in seen:
+            seen[year] = row
+    return list(seen.items())
+
+def ti_summary(rows):
+    """
+    统计TI参赛次数和最好名次
+    Args:
+        rows: parse_results_table返回的记录
+    Returns:
+        dict: {'total_participations': 参赛次数, 'best_placement': 最好名次}
+    """
+    ti_data = {
+        'total_participations': 0,
+        'best_placement': ''
+    }
+    for year, row in ti_rows(rows):
+        ti_data['total_participations'] += 1
+        if not ti_data['best_placement'] or placement_number(row.placement) < placement_number(ti_data['best_placement']):
+            ti_data['best_placement'] = row.placement
+    return ti_data
+
+def ti_details(rows):
+    """
+    统计每届TI的详细成绩
+    Args:
+        rows: parse_results_table返回的记录
+    Returns:
+        dict: {'total_participations', 'years', 'details', 'best_placement': {'year', 'place', 'prize'}}，
+              years和details按年份排序
+    """
+    ti_data = {
+        'total_participations': 0,
+        'years': [],
+        'details': [],
+        'best_placement': {
+            'year': '',
+            'place': '',
+            'prize': ''
+        }
+    }
+    for year, row in ti_rows(rows):
+        ti_data['years'].append(year)
+        ti_data['total_participations'] += 1
+        ti_data['details'].append({
+            'year': year,
+            'date': row.date,
+            'place': row.placement,
+            'team': row.team,
+            'prize': row.prize,
+            'is_highlighted': row.highlighted
+        })
+        best = ti_data['best_placement']
+        if not best['year'] or placement_number(row.placement) < placement_number(best['place']):
+            ti_data['best_placement'] = {
+                'year': year,
+                'place': row.placement,
+                'prize': row.prize
+            }
+
+    ti_data['years'].sort()
+    ti_data['details'].sort(key=lambda x: x['year'])
+    return ti_data
+
+if __name__ == "__main__":
+    # 用法: python results_table.py Results页面HTML文件
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        rows = parse_results_table(f.read())
+    if rows is None:
+        print("未找到比赛结果表格")
+    else:
+        for row in rows:
+            print(row)
+        print(f"共 {len(rows)} 行")
+        print(json.dumps(ti_details(rows), indent=2, ensure_ascii=False))
@@ -0,0 +1,204 @@
+import os
+import re
+import sys
+import json
+import threading
+from datetime import datetime
+from urllib.parse import unquote
+import http_client
+import html_backend
+from cache_store import open_cache, DAY
+from results_table import placement_number
+#按届解析TI页面，建立 选手 -> 每届TI成绩 的索引
+
+# 历届TI正赛（2020年停办）
+TI_YEARS = [year for year in range(2011, datetime.now().year + 1) if year != 2020]
+TI_EVENT_CACHE_FILE = os.path.join("cache", "ti_event_cache.db")
+# 页面不存在、API错误等负缓存的有效期
+NEGATIVE_CACHE_TTL = 1 * DAY
+
+# 年份 -> 该届每个选手的成绩，已结束的TI不会再变化，当年的TI每天更新
+ti_event_cache = open_cache(TI_EVENT_CACHE_FILE)
+
+# 进程内只建立一次的索引
+_ti_index = None
+_ti_index_lock = threading.Lock()
+
+def normalize_player_id(player_id):
+    """
+    统一选手ID格式，与页面链接、all_players.txt中的ID都能对应
+    """
+    player_id = unquote(player_id).replace('_(player)', '').replace(' ', '_')
+    return player_id[:1].upper() + player_id[1:]
+
+def _player_id_from_href(href):
+    if not href or not href.startswith('/dota2/') or ':' in href:
+        return None
+    return normalize_player_id(href.split('/dota2/')[-1])
+
+def _parse_placements(soup):
+    """
+    解析奖金分配表
+    Returns:
+        dict: 战队名 -> {'place': 名次, 'prize': 奖金}
+    """
+    placements = {}
+    rows = soup.select('div.csstable-widget-row, table.prizepooltable tr')
+    place = ''
+    prize = ''
+    for row in rows:
+        text = row.get_text(' ', strip=True)
+        # 同一名次的多支队伍只有第一行带名次和奖金
+        place_match = re.match(r'(\d+(?:st|nd|rd|th)(?:\s*-\s*\d+(?:st|nd|rd|th))?)', text)
+        if place_match:
+            place = place_match.group(1)
+            prize_match = re.search(r'\$\s?[\d,]+', text)
+            prize = prize_match.group(0) if prize_match else ''
+        if not place:
+            continue
+        teams = row.select('.team-template-text a, span.name a')
+        for team_link in teams:
+            team = team_link.get('title') or team_link.get_text(strip=True)
+            if team and team not in placements:
+                placements[team] = {'place': place, 'prize': prize}
+    return placements
+
+def _parse_rosters(soup):
+    """
+    解析参赛队伍名单
+    Returns:
+        dict: 选手ID -> 战队名
+    """
+    rosters = {}
+    for card in soup.select('div.teamcard'):
+        team_link = card.select_one('center a')
+        if not team_link:
+            continue
+        team = team_link.get('title') or team_link.get_text(strip=True)
+        for row in card.select('table tr'):
+            # 只统计正式队员（1-5号位），不包括教练和替补
+            position = row.find('th')
+            if not position or not position.get_text(strip=True).isdigit():
+                continue
+            for link in row.select('td a'):
+                player_id = _player_id_from_href(link.get('href'))
+                if player_id:
+                    rosters.setdefault(player_id, team)
+                    break
+    return rosters
+
+def parse_ti_event(html):
+    """
+    从TI页面提取每个选手的成绩
+    Args:
+        html: TI页面解析后的HTML
+    Returns:
+        dict: 选手ID -> {'place', 'team', 'prize'}
+    """
+    soup = html_backend.make_soup(html)
+    placements = _parse_placements(soup)
+    event_results = {}
+    for player_id, team in _parse_rosters(soup).items():
+        placement = placements.get(team, {'place': '', 'prize': ''})
+        event_results[player_id] = {
+            'place': placement['place'],
+            'team': team,
+            'prize': placement['prize']
+        }
+    return event_results
+
+def get_ti_event(session, year):
+    """
+    获取一届TI的选手成绩（使用缓存）
+    Args:
+        session: requests session
+        year: 年份
+    Returns:
+        dict: 选手ID -> {'place', 'team', 'prize'}，获取失败时返回None
+    """
+    key = str(year)
+    if key in ti_event_cache:
+        return ti_event_cache[key]
+
+    params = {
+        'action': 'parse',
+        'format': 'json',
+        'page': f'The International/{year}',
+        'prop': 'text'
+    }
+    print(f"正在获取 The International {year} 页面...")
+    try:
+        data = http_client.api_get(params, session=session)
+    except Exception as e:
+        print(f"获取 The International {year} 失败: {str(e)}")
+        return None
+
+    if 'error' in data:
+        # 页面不存在（当年的TI页面还没建立）等错误也缓存，避免每个进程都重复请求
+        error = data['error']
+        reason = f"{error.get('code', 'error')}: {error.get('info', '')}"
+        print(f"获取 The International {year} 失败: {reason}")
+        ti_event_cache.set(key, None, ttl=NEGATIVE_CACHE_TTL, negative_reason=reason)
+        return None
+
+    event_results = parse_ti_event(data['parse']['text']['*'])
+    ttl = 1 * DAY if year >= datetime.now().year else None
+    ti_event_cache.set(key, event_results, ttl=ttl)
+    return event_results
+
+def build_ti_index(years=TI_YEARS):
+    """
+    解析每届TI页面，建立选手索引
+    Args:
+        years: 要统计的TI年份
+    Returns:
+        dict: 选手ID -> {年份: {'place', 'team', 'prize'}}
+    """
+    index = {}
+    session = http_client.get_session()
+    for year in years:
+        event_results = get_ti_event(session, year)
+        if not event_results:
+            continue
+        for player_id, result in event_results.items():
+            index.setdefault(player_id, {})[str(year)] = result
+    return index
+
+def get_ti_index():
+    """获取TI索引，同一进程内只建立一次（多线程同时调用时也只建立一次）"""
+    global _ti_index
+    with _ti_index_lock:
+        if _ti_index is None:
+            _ti_index = build_ti_index()
+    return _ti_index
+
+def get_ti_stats_from_index(player_name):
+    """
+    从TI索引获取选手的TI参赛数据，格式与get_player_full_info.get_ti_stats一致
+    只统计有名次的年份，还没有比赛结果的TI（当年的队伍名单已公布）不算参赛
+    Args:
+        player_name: 选手ID
+    Returns:
+        dict: {'total_participations': 参赛次数, 'best_placement': 最好名次}
+    """
+    results = {year: result for year, result in get_ti_index().get(normalize_player_id(player_name), {}).items()
+               if result['place']}
+    best_placement = ''
+    for year in sorted(results):
+        place = results[year]['place']
+        if not best_placement or placement_number(place) < placement_number(best_placement):
+            best_placement = place
+    return {
+        'total_participations': len(results),
+        'best_placement': best_placement
+    }
+
+if __name__ == "__main__":
+    # 用法: python ti_index.py [选手ID]
+    if len(sys.argv) > 1:
+        player_name = sys.argv[1]
+        print(json.dumps(get_ti_index().get(normalize_player_id(player_name), {}), indent=2, ensure_ascii=False))
+        print(get_ti_stats_from_index(player_name))
+    else:
+        index = get_ti_index()
+        print(f"共 {len(index)} 名选手参加过TI")